@@ -0,0 +1,90 @@
+"""
+Sliding-window rate limits for the authentication endpoints.
+
+Logging in runs a deliberately slow password hash, so unlimited attempts can occupy every worker. Each attempt is
+counted per client IP, per username and across all clients in the cache shared by the workers (Redis in
+production); attempts over a limit are rejected before the request body is acted upon.
+
+Counters are kept per fixed window, and the number of attempts in the sliding window ending now is estimated as
+the current window's count plus the previous window's count, weighted by how much of it still overlaps:
+    estimate = previous * (1 - elapsed / window) + current
+This costs two cache reads and one increment per limit, whatever the number of attempts.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from hashlib import sha1
+from rest_framework.throttling import BaseThrottle
+from typing import Callable, Dict, List, Tuple
+
+import time
+
+# scope: (attempts, window in seconds)
+AUTH_THROTTLE_RATES: Dict[str, Tuple[int, int]] = {
+    "ip": (30, 10 * 60),
+    "username": (10, 10 * 60),
+    # sheds load once the workers as a whole are busy enough hashing passwords
+    "global": (300, 60),
+    **getattr(settings, "AUTH_THROTTLE_RATES", {}),
+}
+
+_counter_key = "auth_throttle:{scope}:{kind}:{ident}:{window}"
+
+
+def _count(key: str, timeout: int) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # the counter of a new window does not exist yet
+        if cache.add(key, 1, timeout=timeout):
+            return 1
+        return cache.incr(key)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Limits the attempts of a view per client IP, per username and globally.
+
+    Views name the username of an attempt through `throttle_username(request)`; it must not touch the database.
+    """
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_idents(self, request, view) -> List[Tuple[str, str]]:
+        idents = [("ip", self.get_ident(request)), ("global", "all")]
+        get_username: Callable | None = getattr(view, "throttle_username", None)
+        username = get_username(request) if get_username is not None else None
+        # the username comes from the request before validation and may be of any JSON type
+        if isinstance(username, str) and username != "":
+            # usernames are free text; hashing keeps the keys short and free of whitespace
+            idents.append(("username", sha1(username.lower().encode()).hexdigest()[:16]))
+        return idents
+
+    def allow_request(self, request, view) -> bool:
+        now = time.time()
+        scope = getattr(view, "throttle_scope", view.__class__.__name__)
+        counters = []
+        for kind, ident in self.get_idents(request, view):
+            limit, window = AUTH_THROTTLE_RATES[kind]
+            number, elapsed = divmod(now, window)
+            current_key = _counter_key.format(scope=scope, kind=kind, ident=ident, window=int(number))
+            previous_key = _counter_key.format(scope=scope, kind=kind, ident=ident, window=int(number) - 1)
+            counts = cache.get_many([current_key, previous_key])
+            current, previous = counts.get(current_key, 0), counts.get(previous_key, 0)
+
+            if previous * (1 - elapsed / window) + current >= limit:
+                if current >= limit:
+                    self.retry_after = window - elapsed
+                else:
+                    # the estimate drops below the limit once enough of the previous window has slid out
+                    self.retry_after = max(1.0, window * (1 - (limit - current) / previous) - elapsed)
+                return False
+            counters.append((current_key, window))
+
+        for key, window in counters:
+            # a window's counter is still read during the following window
+            _count(key, timeout=2 * window)
+        return True
+
+    def wait(self):
+        return self.retry_after
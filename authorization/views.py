@@ -1,9 +1,11 @@
 import jwt
+import logging
 import regex
 
 from datetime import datetime, timezone, timedelta
 from authorization.models import TOTP, generate_base32
 from authorization.serializers import Token
+from authorization.throttling import SlidingWindowThrottle
 from authorization.utils import token_version, JWTAuthentication, generate_reset_password_session, verify_reset_password_session, delete_reset_password_session
 from django.contrib.auth.models import User
 from pydantic import BaseModel, ValidationError
@@ -18,8 +20,7 @@ from rest_framework.views import APIView
 
 from django.conf import settings
 
-
-# Figure out throttling for later. Must throttle for a day on 10 failed requests in 10 minutes.
+logger = logging.getLogger(__name__)
 
 
 class AuthInitView(APIView):
@@ -29,6 +30,13 @@ class AuthInitView(APIView):
 
     Raises APIException on failure at any stage.
     """
+    # attempts are throttled before any lookup or password hashing, see authorization.throttling
+    authentication_classes = []
+    throttle_classes = [SlidingWindowThrottle]
+
+    def throttle_username(self, request: Request) -> str | None:
+        username = request.data.get("username") if isinstance(request.data, dict) else None
+        return username if isinstance(username, str) else None
 
     class InitRequest(BaseModel):
         username: str
@@ -71,9 +79,19 @@ class AuthVerifyView(APIView):
     raises APIException on failure at any stage.
     """
 
+    authentication_classes = []
+    throttle_classes = [SlidingWindowThrottle]
+
     class VerifyRequest(BaseModel):
         otp: str
 
+    def throttle_username(self, request: Request) -> str | None:
+        try:
+            token_string = get_authorization_header(request).decode().split()[1]
+            return jwt.decode(token_string, settings.SECRET_KEY, ["HS256"]).get("username")
+        except Exception:
+            return None
+
     def post(self, request: Request, *args, **kwargs):
         try:
             token_string = get_authorization_header(request).decode().split()[1]
@@ -139,6 +157,11 @@ class AuthInitiateResetPasswordView(APIView):
     """
     Initiates a reset password session and sends an email to the 'user' initiating.
     """
+    authentication_classes = []
+    throttle_classes = [SlidingWindowThrottle]
+
+    def throttle_username(self, request: Request) -> str | None:
+        return request.query_params.get("ident")
 
     def get(self, request: Request, *args, **kwargs):
         try:
@@ -149,12 +172,12 @@ class AuthInitiateResetPasswordView(APIView):
                 user = User.objects.get(email=ident)
             else:
                 user = User.objects.get(username=ident)
-            print(user)
             token = generate_reset_password_session(user)
             link = f"/forgot_password?session={token}"
             # user.email_user("[Morpho Design Explorer] Reset Password Request", "We received a request to reset your password. Here's the link: {link}. <br/> If this wasn't you, ignore this email. <br/><br/>Admin,<br/>Morpho Design Explorer".format(**{"link": link}))
-            # Print this link during development.
-            print("link: ", link)
+            # Log this link during development.
+            if settings.DEBUG:
+                logger.info("Reset password link for user '%s': %s", user.username, link)
         except Exception as e:
             pass
         # this endpoint must behave uniformly regardless of whether the operation succeeded or not.
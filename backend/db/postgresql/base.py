@@ -0,0 +1,39 @@
+"""
+PostgreSQL backend that measures how long workers wait for database connections.
+
+Every new connection and every health check of a persistent connection is timed. Timings are logged on the
+`backend.db` logger (at WARNING when slower than DB_CONNECT_SLOW_MS) and summed per process in `acquire_stats`.
+"""
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+import logging
+import time
+
+logger = logging.getLogger("backend.db")
+
+DB_CONNECT_SLOW_MS = getattr(settings, "DB_CONNECT_SLOW_MS", 100)
+
+# per process: {"connects": int, "connect_seconds": float, "max_connect_seconds": float, "health_checks": int, "health_check_seconds": float}
+acquire_stats = {"connects": 0, "connect_seconds": 0.0, "max_connect_seconds": 0.0, "health_checks": 0, "health_check_seconds": 0.0}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        elapsed = time.perf_counter() - start
+
+        acquire_stats["connects"] += 1
+        acquire_stats["connect_seconds"] += elapsed
+        acquire_stats["max_connect_seconds"] = max(acquire_stats["max_connect_seconds"], elapsed)
+        level = logging.WARNING if elapsed * 1000 > DB_CONNECT_SLOW_MS else logging.INFO
+        logger.log(level, "Opened connection to '%s' in %.1f ms.", self.alias, elapsed * 1000)
+
+    def is_usable(self):
+        # called by CONN_HEALTH_CHECKS before a persistent connection is reused by a request
+        start = time.perf_counter()
+        usable = super().is_usable()
+        acquire_stats["health_checks"] += 1
+        acquire_stats["health_check_seconds"] += time.perf_counter() - start
+        return usable
@@ -0,0 +1,86 @@
+"""
+Routing of read traffic to database replicas.
+
+Safe-method requests on views marked with `read_from_replica = True` read from one of REPLICA_DATABASES; everything
+else, and every write, uses the primary ("default"). A client that just wrote something gets a short-lived cookie
+pinning its requests to the primary, so it reads its own writes despite replication lag.
+
+With REPLICA_DATABASES empty (the default), every query goes to the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+import random
+
+REPLICA_DATABASES = getattr(settings, "REPLICA_DATABASES", [])
+# how long a client reads from the primary after a write; should exceed the usual replication lag
+REPLICA_PIN_SECONDS = getattr(settings, "REPLICA_PIN_SECONDS", 10)
+PIN_COOKIE = "read_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def read_from_replicas(enabled: bool = True):
+    """
+    Sends the reads made within the block to the replicas (or, with enabled=False, to the primary).
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reading_from_replicas() -> bool:
+    return len(REPLICA_DATABASES) > 0 and _replica_reads.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replicas():
+            return random.choice(REPLICA_DATABASES)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema through replication
+        return db not in REPLICA_DATABASES
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Enables replica reads for safe-method requests on views that allow them, unless the client is pinned to the
+    primary, and pins clients to the primary after a successful write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400 and len(REPLICA_DATABASES) > 0:
+                response.set_cookie(PIN_COOKIE, "1", max_age=REPLICA_PIN_SECONDS, httponly=True, samesite="Lax")
+            return response
+
+        with read_from_replicas(PIN_COOKIE not in request.COOKIES and self.allows_replica(request)):
+            return self.get_response(request)
+
+    def allows_replica(self, request) -> bool:
+        if len(REPLICA_DATABASES) == 0:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return getattr(getattr(match.func, "cls", None), "read_from_replica", False)
@@ -6,7 +6,7 @@ def exception_with_code_handler(exc, context):
     # to get the standard error response.
     response = exception_handler(exc, context)
 
-    if isinstance(exc, APIException):
+    if isinstance(exc, APIException) and isinstance(response.data, dict):
         response.data["code"] = exc.get_codes()
 
     return response
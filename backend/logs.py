@@ -0,0 +1,92 @@
+"""
+Logging that stays out of request latency.
+
+Records are put on an in-memory queue by the handler attached to the loggers and written out by a background
+thread, so a request never waits for a file or a terminal. When the writer falls behind and the queue is full,
+records are dropped (and counted) rather than blocking. Output is one JSON object per line, and high-volume debug
+records can be sampled down before they reach the queue.
+"""
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+
+# attributes every LogRecord has; anything else was passed through `extra=` and is included in the output
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats a record as a single-line JSON object, with `extra=` fields as additional keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.thread,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through only a fraction `rate` of the records at or below `level`; records above it all pass.
+    """
+
+    def __init__(self, rate: float = 0.01, level: str | int = logging.DEBUG):
+        super().__init__()
+        self.rate = rate
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > self.level or random.random() < self.rate
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Hands records to a background thread that passes them on to `handlers`.
+
+    In a dictConfig, list the target handlers as "cfg://handlers.<name>". dictConfig sets up handlers in order of
+    their names and these references resolve to handlers already set up, so the queue handler's name has to sort
+    after its targets' names.
+    """
+
+    def __init__(self, handlers, maxsize: int = 10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped = 0
+        # dictConfig passes a converting list, whose items resolve on indexing
+        self.listener = QueueListener(self.queue, *[handlers[index] for index in range(len(handlers))], respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # arguments and tracebacks may not be picklable or may change before the writer gets to them; resolve them now
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text, record.exc_info = logging.Formatter().formatException(record.exc_info), None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
@@ -46,18 +46,38 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# set by backend.asgi; ASGI requests run their queries in threads that do not outlive them, so a connection kept
+# open past the request would never be reused nor closed
+SERVES_ASGI = os.getenv('DJANGO_SERVER_INTERFACE') == 'asgi'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'backend.db.postgresql',
         'NAME': os.environ['POSTGRES_DB'],
         'USER': os.environ['POSTGRES_USER'],
         'PASSWORD': os.environ['POSTGRES_PASSWORD'],
         'HOST': os.environ['POSTGRES_HOST'],
         'PORT': os.environ['POSTGRES_PORT'],
+        # under WSGI, every sync worker keeps one connection open across requests; it is pinged before each reuse.
+        # Set POSTGRES_CONN_MAX_AGE=0 when connections go through a pooler.
+        'CONN_MAX_AGE': 0 if SERVES_ASGI else int(os.getenv('POSTGRES_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        # server-side cursors must be disabled behind a transaction-mode pooler (e.g. pgbouncer)
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('POSTGRES_DISABLE_SERVER_SIDE_CURSORS') == 'TRUE',
     }
 }
 
-CONN_MAX_AGE = None
+# Read replicas, e.g. POSTGRES_REPLICA_HOSTS=replica1,replica2 (see backend.db_router)
+REPLICA_DATABASES = []
+for index, host in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(f'replica_{index}')
+
+# Schema built ahead of time with `manage.py spectacular --file <path>`; generated on first request if unset
+OPENAPI_SCHEMA_FILE = os.getenv('OPENAPI_SCHEMA_FILE')
+
+# nginx in front of gunicorn appends the client address to X-Forwarded-For
+REST_FRAMEWORK['NUM_PROXIES'] = int(os.getenv('NUM_PROXIES', 1))
 
 # Redis Caching
 
@@ -68,9 +88,11 @@ CACHES = {
     }
 }
 
-INSTALLED_APPS += [
-    'cachalot'
-]
+# Live change streams are fanned out to every worker through Redis pub/sub (see main_process.events).
+EVENT_STREAM_REDIS_URL = "redis://redis:6379"
+
+# Query results are cached per project (see main_process.cache); a write only invalidates the project it touches.
+PROJECT_CACHE_TIMEOUT = 60 * 60 * 24
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
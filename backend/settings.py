@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 from pathlib import Path
+import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',          # search lookups
     'main_process',                     # Main Application
     'rest_framework',                   # Rest Framework
     'rest_framework.authtoken',         # Token Authentication
@@ -59,6 +61,7 @@ MIDDLEWARE = [
     'django_otp.middleware.OTPMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -94,6 +97,11 @@ DATABASES = {
     # add production: postgresql
 }
 
+# Safe-method reads of the explorer views can be served by replicas (see backend.db_router).
+# List the aliases of replica databases in REPLICA_DATABASES to enable it.
+DATABASE_ROUTERS = ['backend.db_router.ReplicaRouter']
+REPLICA_DATABASES = []
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -143,6 +151,11 @@ LOGIN_REDIRECT_URL = 'two_factor:setup'
 TWO_FACTOR_REMEMBER_COOKIE_AGE = 60 * 60 * \
     24 * 7   # Remember user session for 7 days
 
+# Records are written by a background thread (see backend.logs), one JSON object per line. Debug records of the
+# project's own loggers, enabled with LOG_LEVEL=DEBUG, are sampled down to LOG_DEBUG_SAMPLE_RATE.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.01))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -155,24 +168,44 @@ LOGGING = {
             "format": "{levelname} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "backend.logs.JSONFormatter",
+        },
+    },
+    "filters": {
+        "sample_debug": {
+            "()": "backend.logs.SamplingFilter",
+            "rate": LOG_DEBUG_SAMPLE_RATE,
+        },
     },
     'handlers': {
         "file": {
             "level": "INFO",
             "class": "logging.FileHandler",
             "filename": "deployment.log",
-            "formatter": "verbose"
+            "formatter": "json"
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
+            "formatter": "json"
+        },
+        # must sort after the handlers it feeds, see backend.logs.BackgroundQueueHandler
+        "queue": {
+            "()": "backend.logs.BackgroundQueueHandler",
+            "handlers": ["cfg://handlers.console", "cfg://handlers.file"],
+            "filters": ["sample_debug"],
         },
     },
     'loggers': {
         "": {
-            "handlers": ["file", "console"],
+            "handlers": ["queue"],
             "level": "ERROR",
-        }
+        },
+        **{
+            name: {"level": LOG_LEVEL}
+            for name in ("authorization", "backend", "main_process")
+        },
     }
 }
 
@@ -183,5 +216,8 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'EXCEPTION_HANDLER': 'backend.exception_handler.exception_with_code_handler'
+    'EXCEPTION_HANDLER': 'backend.exception_handler.exception_with_code_handler',
+    # number of reverse proxies in front of the application; client IPs (e.g. for throttling) are taken from
+    # X-Forwarded-For only as far as these proxies set it. 0 uses the address of the connecting peer.
+    'NUM_PROXIES': 0,
 }
@@ -2,10 +2,13 @@ import multiprocessing
 
 accesslog = "-"  # stdin for journalctl
 errorlog = "/app/django.log"
-loglevel = 'debug'
-capture_output = True
+loglevel = 'info'
+# application logs go through Django's logging (see backend.logs); stray output is not redirected into the error log
+capture_output = False
 workers = multiprocessing.cpu_count() * 2 + 1
 # bind = "127.0.0.1:8000" # Debug Config
 bind = "unix:/run/gunicorn.sock"
 raw_env = ["DJANGO_SETTINGS_MODULE=backend.production_settings"]
-wsgi_app = "backend.wsgi"
+# the ASGI application serves the async change streams as well as the regular views
+worker_class = "uvicorn.workers.UvicornWorker"
+wsgi_app = "backend.asgi:application"
@@ -0,0 +1,60 @@
+"""
+Neighbours of a model on its project's parameter grid.
+
+Projects sample their variable fields on steps of `field_step` within `field_range`. The neighbours of a model along
+a field are the models whose parameters differ from its own by exactly one step of that field. Every model is
+indexed by the fingerprint of its schema-ordered parameter vector (parameter_hash, unique per project and written on
+insert), so the neighbours are found by computing their fingerprints and probing that index: one query for all axes.
+"""
+from decimal import Decimal
+from django.db.models import QuerySet
+from morpho_typing import MorphoBaseType
+from typing import Dict
+
+from main_process.compact import expand_values, field_names
+from main_process.models import GeneratedModel, Project, parameter_fingerprint
+
+DIRECTIONS = (("previous", -1), ("next", 1))
+
+
+def _step(field: Dict, value, direction: int):
+    # steps are added in decimal, so that 0.1 + 0.2 is 0.3 as it would have been written by the client
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not field["field_step"]:
+        return None
+    stepped = Decimal(str(value)) + direction * Decimal(str(field["field_step"]))
+    low, high = (Decimal(str(bound)) for bound in field["field_range"])
+    if not low <= stepped <= high:
+        return None
+    if field["field_precision"] is not None:
+        stepped = round(stepped, field["field_precision"])
+    return MorphoBaseType(field["field_type"]).native_type(stepped)
+
+
+def grid_neighbours(queryset: QuerySet, project: Project, model: GeneratedModel) -> Dict[str, Dict[str, GeneratedModel | None]]:
+    """
+    Returns the neighbours of a model along every numeric variable field, as {field_name: {"previous": model or None,
+    "next": model or None}}.
+
+    :param queryset: the project's models to take the neighbours from.
+    """
+    names = field_names(project.variable_metadata)
+    parameters = expand_values(names, model.parameters)
+    record = [parameters.get(name) for name in names]
+
+    neighbours, probes = {}, {}
+    for index, field in enumerate(project.variable_metadata):
+        if MorphoBaseType(field["field_type"]) == MorphoBaseType.STRING:
+            continue
+        neighbours[field["field_name"]] = {direction: None for direction, _ in DIRECTIONS}
+        for direction, sign in DIRECTIONS:
+            value = _step(field, record[index], sign)
+            if value is None:
+                continue
+            probe = list(record)
+            probe[index] = value
+            probes[parameter_fingerprint(probe)] = (field["field_name"], direction)
+
+    for neighbour in queryset.filter(parameter_hash__in=probes.keys()):
+        name, direction = probes[neighbour.parameter_hash]
+        neighbours[name][direction] = neighbour
+    return neighbours
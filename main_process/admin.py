@@ -1,8 +1,70 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from main_process.models import Project, GeneratedModel, AssetFile
 
-# Register your models here.
+import json
 
-admin.site.register(Project)
-admin.site.register(GeneratedModel)
-admin.site.register(AssetFile)
+# changelists with more rows than this, according to the planner, show an estimated count
+ADMIN_EXACT_COUNT_LIMIT = getattr(settings, "ADMIN_EXACT_COUNT_LIMIT", 10000)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the row count of large querysets from the PostgreSQL planner instead of counting them.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return super().count
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        return estimate if estimate > ADMIN_EXACT_COUNT_LIMIT else super().count
+
+
+@admin.register(Project)
+class ProjectAdmin(admin.ModelAdmin):
+    list_display = ("project_name", "creation_date", "schema_version", "compact_storage", "archived", "deleted")
+    list_filter = ("deleted", "archived")
+    search_fields = ("project_name",)
+
+
+@admin.register(GeneratedModel)
+class GeneratedModelAdmin(admin.ModelAdmin):
+    list_display = ("id", "project", "scoped_id", "schema_version")
+    list_filter = ("project",)
+    # the changelist walks the (project, scoped_id) index; other orderings would sort the whole table
+    ordering = ("project", "scoped_id")
+    sortable_by = ()
+    list_select_related = ("project",)
+    raw_id_fields = ("project",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # parameter values are only needed on the change page, which loads them on access
+        return super().get_queryset(request).defer("parameters", "output_parameters")
+
+
+@admin.register(AssetFile)
+class AssetFileAdmin(admin.ModelAdmin):
+    list_display = ("id", "generated_model", "tag", "file")
+    list_filter = ("generated_model__project",)
+    sortable_by = ()
+    list_select_related = ("generated_model",)
+    raw_id_fields = ("generated_model",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("generated_model__parameters", "generated_model__output_parameters")
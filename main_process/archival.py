@@ -0,0 +1,98 @@
+"""
+Cold archival of deleted projects.
+
+Deleting a project only flags it, so its generated models and asset rows would otherwise stay in the hot tables
+and every index and scan over them keeps paying for the project. Archival moves these rows into compressed
+ArchivedModelBatch rows; restoration moves them back.
+"""
+from contextlib import nullcontext
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from main_process.models import ArchivedModelBatch, AssetFile, GeneratedModel, Project
+from main_process.partitioning import create_partition, drop_partition, is_partitioned
+
+import json
+import zlib
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def _columns(model) -> list[str]:
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def archive_project(project: Project, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Moves the generated models and asset rows of a deleted project into the archive.
+
+    Every batch is archived and removed from the hot tables in its own transaction, so an interrupted run
+    loses nothing and can simply be started again. If generated_model is partitioned, the project's partition
+    is dropped instead (see main_process.partitioning).
+
+    :param project: a project flagged as deleted.
+    :param batch_size: number of models per archive batch.
+    :returns: the number of models archived.
+    """
+    if not project.deleted:
+        raise ValueError(f"Project '{project.project_name}' is not deleted and cannot be archived.")
+
+    partitioned = is_partitioned()
+    archived, last_id = 0, 0
+    # with a partition per project, the batches are archived in one transaction that ends by dropping the
+    # project's partition, instead of deleting the models batch by batch
+    with transaction.atomic() if partitioned else nullcontext():
+        while True:
+            with transaction.atomic():
+                models = list(
+                    GeneratedModel.objects.select_for_update().filter(project=project, id__gt=last_id).order_by("id").values(*_columns(GeneratedModel))[:batch_size]
+                )
+                if len(models) == 0:
+                    break
+                model_ids = [model["id"] for model in models]
+                files = list(AssetFile.objects.filter(generated_model__in=model_ids).values(*_columns(AssetFile)))
+
+                payload = json.dumps({"models": models, "files": files}, cls=DjangoJSONEncoder)
+                ArchivedModelBatch.objects.create(project=project, model_count=len(models), payload=zlib.compress(payload.encode()))
+
+                # raw deletes skip the per-row delete signals; saving the project below invalidates its cache once
+                AssetFile.objects.filter(id__in=[file["id"] for file in files])._raw_delete(AssetFile.objects.db)
+                if not partitioned:
+                    GeneratedModel.objects.filter(id__in=model_ids)._raw_delete(GeneratedModel.objects.db)
+                last_id = model_ids[-1]
+                archived += len(models)
+
+        if partitioned:
+            drop_partition(project.project_name)
+
+    project.archived = True
+    project.save(update_fields=["archived"])
+    return archived
+
+
+def restore_project(project: Project, undelete: bool = True) -> int:
+    """
+    Moves the archived models and asset rows of a project back into the hot tables.
+
+    :param project: an archived project.
+    :param undelete: also clears the project's deleted flag.
+    :returns: the number of models restored.
+    """
+    if is_partitioned():
+        create_partition(project.project_name)
+
+    restored = 0
+    for batch_id in project.archived_batches.order_by("id").values_list("id", flat=True):
+        with transaction.atomic():
+            batch = ArchivedModelBatch.objects.select_for_update().get(id=batch_id)
+            payload = json.loads(zlib.decompress(batch.payload))
+            # rows archived before a column existed simply take the column's default
+            GeneratedModel.objects.bulk_create([GeneratedModel(**model) for model in payload["models"]])
+            AssetFile.objects.bulk_create([AssetFile(**file) for file in payload["files"]])
+            batch.delete()
+            restored += batch.model_count
+
+    project.archived = False
+    if undelete:
+        project.deleted = False
+    project.save(update_fields=["archived", "deleted"])
+    return restored
@@ -0,0 +1,126 @@
+"""
+Online backfill of fields appended to a project's schema.
+
+Appending fields to a project leaves its existing models without values for them. The update records a
+SchemaBackfill job holding a value for every added field; `run_backfill` then fills these values into the models
+that existed at the time, a small batch per transaction, so each batch only locks its own rows for a moment and
+the project stays writable throughout. Adding variable fields changes the parameter vector, so the parameter
+fingerprints of backfilled models are recomputed as well. Every backfilled model is recorded in the project's
+change log, so that clients syncing from it pick up the new values.
+"""
+from django.db import IntegrityError, transaction
+from morpho_typing import MorphoBaseType
+from typing import Callable, Dict, List
+
+from main_process.cache import invalidate_project
+from main_process.compact import compact_values, expand_values, field_names
+from main_process.models import GeneratedModel, ProjectChange, SchemaBackfill, parameter_fingerprint
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def field_default(field: Dict, column: str):
+    """
+    Returns the value an added field takes in existing models: its `field_default` if the schema update gave one,
+    otherwise the lower bound of its range for parameters, and null for outputs.
+    """
+    if "field_default" in field:
+        value = field["field_default"]
+    elif column == "parameters":
+        value = field["field_range"][0]
+    else:
+        return None
+    return MorphoBaseType(field["field_type"]).native_type(value) if value is not None else None
+
+
+def _fill(values: Dict | List | None, names: List[str], defaults: Dict) -> bool:
+    """
+    Adds the missing defaulted fields to a model's values in place; returns whether anything was added.
+    """
+    # converting the storage of a project writes the fields it does not have values for yet as nulls
+    if isinstance(values, dict):
+        missing = [name for name in defaults if name not in values or values[name] is None and defaults[name] is not None]
+        for name in missing:
+            values[name] = defaults[name]
+        return len(missing) > 0
+    if isinstance(values, list):
+        # compactly stored arrays are prefixes of the schema order, and fields are only ever appended
+        filled = False
+        for index, name in enumerate(names):
+            if name not in defaults:
+                continue
+            if index >= len(values):
+                values.extend([None] * (index + 1 - len(values)))
+                filled = True
+            if values[index] is None and defaults[name] is not None:
+                values[index] = defaults[name]
+                filled = True
+        return filled
+    return False
+
+
+def run_backfill(job: SchemaBackfill, batch_size: int = BACKFILL_BATCH_SIZE, pause: float = 0.0, log: Callable[[str], None] = logger.info) -> int:
+    """
+    Fills the added fields of a backfill job into the project's models, resuming where a previous run stopped.
+
+    :param batch_size: number of models updated per transaction.
+    :param pause: seconds to wait between batches, to leave room for the regular load.
+    :param log: receives progress messages.
+    :returns: the number of models that were changed.
+    """
+    project = job.project
+    variable_names, output_names = field_names(project.variable_metadata), field_names(project.output_metadata)
+    defaults = {"parameters": job.defaults.get("parameters", {}), "output_parameters": job.defaults.get("output_parameters", {})}
+
+    queryset = GeneratedModel.objects.filter(project=project, id__lte=job.max_id).order_by("id")
+    total = job.processed + queryset.filter(id__gt=job.last_id).count()
+    job.status, job.error = SchemaBackfill.Status.RUNNING, ""
+    job.save(update_fields=["status", "error", "update_date"])
+
+    changed = 0
+    try:
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    queryset.select_for_update().filter(id__gt=job.last_id)
+                    .only("id", "scoped_id", "parameters", "output_parameters", "parameter_hash", "schema_version")[:batch_size]
+                )
+                if len(batch) == 0:
+                    break
+                updated = []
+                for model in batch:
+                    parameters_filled = _fill(model.parameters, variable_names, defaults["parameters"])
+                    outputs_filled = _fill(model.output_parameters, output_names, defaults["output_parameters"])
+                    if parameters_filled:
+                        # compacting casts the values to their fields' types, as the serializer does before hashing
+                        record = compact_values(project.variable_metadata, expand_values(variable_names, model.parameters))
+                        model.parameter_hash = parameter_fingerprint(record)
+                    if parameters_filled or outputs_filled:
+                        model.schema_version = max(model.schema_version, job.schema_version)
+                        updated.append(model)
+                GeneratedModel.objects.bulk_update(updated, ["parameters", "output_parameters", "parameter_hash", "schema_version"])
+                ProjectChange.record(project.project_name, [(ProjectChange.Kind.MODEL_UPDATED, model.scoped_id, None) for model in updated])
+
+                job.last_id = batch[-1].id
+                job.processed += len(batch)
+                job.save(update_fields=["last_id", "processed", "update_date"])
+                # bulk updates do not send post_save
+                invalidate_project(project.project_name)
+            changed += len(updated)
+            log(f"Backfilled {job.processed} of {total} models of project '{project.project_name}'.")
+            if pause > 0:
+                time.sleep(pause)
+    except IntegrityError as e:
+        # a model created since the change may already hold the parameters a backfilled model now has
+        job.status, job.error = SchemaBackfill.Status.FAILED, f"Backfill would duplicate the parameters of another model: {e}"
+        job.save(update_fields=["status", "error", "update_date"])
+        raise
+
+    job.status = SchemaBackfill.Status.DONE
+    job.save(update_fields=["status", "update_date"])
+    return changed
@@ -0,0 +1,121 @@
+"""
+Project-scoped caching of query results.
+
+Every project owns a version counter in the cache. Cached entries embed that version in their key, so a write
+to a project only has to bump its counter to make every entry cached for that project unreachable. Entries of
+other projects are left untouched, unlike table-wide invalidation where any write flushes every project.
+"""
+from backend.db_router import REPLICA_PIN_SECONDS, read_from_replicas, reading_from_replicas
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from hashlib import sha1
+from time import time_ns
+from typing import Any, Callable, Dict, Iterable
+
+PROJECT_CACHE_TIMEOUT = getattr(settings, "PROJECT_CACHE_TIMEOUT", 60 * 60)
+
+_version_key = "project_cache:{project}:version"
+_entry_key = "project_cache:{project}:{version}:{namespace}:{digest}"
+_counter_key = "project_cache:{project}:{counter}"
+_written_key = "project_cache:{project}:written"
+
+
+def _project_fragment(project_name: str) -> str:
+    # project names are free text; hashing keeps the keys short and free of whitespace
+    return sha1(project_name.encode()).hexdigest()[:16]
+
+
+def _increment(key: str, initial: int = 1, timeout=None):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # counter was missing or evicted
+        if cache.add(key, initial, timeout=timeout):
+            return initial
+        return cache.incr(key)
+
+
+def project_version(project_name: str) -> int:
+    """
+    Returns the current cache version of a project.
+    """
+    key = _version_key.format(project=_project_fragment(project_name))
+    version = cache.get(key)
+    if version is None:
+        # seed with a timestamp so that an evicted counter never resumes at a previously used version
+        cache.add(key, time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_project(project_name: str):
+    """
+    Drops every cached entry of a project by bumping its version.
+
+    The bump is deferred until the surrounding transaction commits; bumping earlier would let a concurrent
+    reader cache pre-commit data under the new version.
+    """
+    fragment = _project_fragment(project_name)
+    key = _version_key.format(project=fragment)
+
+    def bump():
+        _increment(key, initial=time_ns())
+        # replicas may lag behind the commit for a while; see cached_for_project
+        cache.set(_written_key.format(project=fragment), True, timeout=REPLICA_PIN_SECONDS)
+
+    transaction.on_commit(bump)
+
+
+def cached_for_project(project_name: str, namespace: str, params: Dict[str, Any], builder: Callable[[], Any]):
+    """
+    Returns the cached result of `builder` for a project, computing and storing it on a miss.
+
+    :param project_name: the project that owns the result; writes to this project invalidate it.
+    :param namespace: identifies the kind of result (e.g. "models", "files").
+    :param params: anything else that distinguishes the result, usually the query parameters.
+    :param builder: a callable producing the result on a miss. The result must be picklable.
+    """
+    fragment = _project_fragment(project_name)
+    digest = sha1(repr(sorted((key, str(value)) for key, value in params.items())).encode()).hexdigest()
+    key = _entry_key.format(project=fragment, version=project_version(project_name), namespace=namespace, digest=digest)
+
+    data = cache.get(key)
+    if data is not None:
+        _increment(_counter_key.format(project=fragment, counter="hits"))
+        return data
+
+    _increment(_counter_key.format(project=fragment, counter="misses"))
+    if reading_from_replicas() and cache.get(_written_key.format(project=fragment)) is not None:
+        # a replica may not have the latest write yet, and caching its answer under the new version would
+        # serve stale data until the next write; recently written projects are built from the primary
+        with read_from_replicas(False):
+            data = builder()
+    else:
+        data = builder()
+    cache.set(key, data, PROJECT_CACHE_TIMEOUT)
+    return data
+
+
+def project_cache_stats(project_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns hit/miss statistics of the project cache, keyed by project name.
+    """
+    keys = {}
+    for project_name in project_names:
+        fragment = _project_fragment(project_name)
+        keys[project_name] = (
+            _counter_key.format(project=fragment, counter="hits"),
+            _counter_key.format(project=fragment, counter="misses"),
+        )
+    values = cache.get_many([key for pair in keys.values() for key in pair])
+
+    stats = {}
+    for project_name, (hits_key, misses_key) in keys.items():
+        hits, misses = values.get(hits_key, 0), values.get(misses_key, 0)
+        stats[project_name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses > 0 else None,
+        }
+    return stats
@@ -0,0 +1,45 @@
+"""
+Compact storage of model values.
+
+Models of a project with `compact_storage` enabled store their parameters and outputs as arrays ordered like the
+project's schema, instead of objects that repeat every field name in every row. The API keeps accepting and
+emitting objects; values are compacted on write and expanded on read.
+
+Schemas can only be added to, so an array written under an older schema version is a prefix of the current
+field order and expands to the fields that existed when it was written.
+"""
+from morpho_typing import MorphoBaseType
+from typing import Dict, List
+
+
+def field_names(metadata: List[Dict]) -> List[str]:
+    """
+    Returns the field names of a project's variable_metadata or output_metadata, in schema order.
+    """
+    return [field["field_name"] for field in metadata]
+
+
+def compact_values(metadata: List[Dict], values: Dict | List | None) -> List | None:
+    """
+    Converts an object of field values into an array ordered like the schema, with each value cast to its field's type.
+    Arrays and nulls are returned unchanged.
+    """
+    if not isinstance(values, dict):
+        return values
+    record = []
+    for field in metadata:
+        value = values.get(field["field_name"])
+        if value is not None:
+            value = MorphoBaseType(field["field_type"]).native_type(value)
+        record.append(value)
+    return record
+
+
+def expand_values(names: List[str], values: Dict | List | None) -> Dict | None:
+    """
+    Converts a compactly stored array back into an object of field values.
+    Objects and nulls are returned unchanged.
+    """
+    if not isinstance(values, list):
+        return values
+    return dict(zip(names, values))
@@ -0,0 +1,120 @@
+"""
+Streaming ZIP archives of a project's asset files.
+
+The archive is written to a non-seekable buffer and handed to the client chunk by chunk while it is being built,
+so neither the archive nor a temporary file of it ever exists in full. Files are read from the storage backend by
+a small pool of threads a bounded number of files ahead of the writer: memory holds at most that many files.
+
+Under ASGI, Django consumes a sync iterator in one go before sending any of it, so the archive is handed over
+through an async iterator there instead, which builds each chunk in a worker thread as the client takes it.
+"""
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.storage import Storage
+from typing import AsyncIterator, Iterable, Iterator, List, Tuple
+
+import logging
+import os
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+ZIP_READ_CONCURRENCY = getattr(settings, "ZIP_READ_CONCURRENCY", 4)
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer:
+    """
+    Write-only file object collecting the bytes produced by zipfile until they are taken by the response.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _read(storage: Storage, name: str) -> bytes | None:
+    try:
+        with storage.open(name, "rb") as file:
+            return file.read()
+    except Exception:
+        logger.exception("Could not read asset file '%s'; it is left out of the archive.", name)
+        return None
+
+
+def _read_ahead(storage: Storage, entries: List[Tuple[str, str]]) -> Iterator[Tuple[str, bytes | None]]:
+    # keeps at most ZIP_READ_CONCURRENCY reads in flight, yielding the files in their original order
+    with ThreadPoolExecutor(max_workers=ZIP_READ_CONCURRENCY) as executor:
+        pending = []
+        for path, name in entries:
+            pending.append((path, executor.submit(_read, storage, name)))
+            if len(pending) >= ZIP_READ_CONCURRENCY:
+                path, future = pending.pop(0)
+                yield path, future.result()
+        for path, future in pending:
+            yield path, future.result()
+
+
+def stream_zip(storage: Storage, entries: Iterable[Tuple[str, str]]) -> Iterator[bytes]:
+    """
+    Yields a ZIP archive of storage files as it is built.
+
+    :param storage: the storage backend holding the files.
+    :param entries: pairs of (path inside the archive, file name in the storage).
+    """
+    buffer = _StreamBuffer()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(buffer, mode="w", allowZip64=True) as archive:
+        for path, content in _read_ahead(storage, list(entries)):
+            if content is None:
+                continue
+            info = zipfile.ZipInfo(path, date_time=date_time)
+            # asset files are mostly compressed formats already, so they are stored as they are
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = len(content)
+            with archive.open(info, mode="w") as entry:
+                for start in range(0, len(content), ZIP_CHUNK_SIZE):
+                    entry.write(content[start:start + ZIP_CHUNK_SIZE])
+                    yield buffer.take()
+        # the central directory is written when the archive is closed
+    yield buffer.take()
+
+
+async def astream_zip(storage: Storage, entries: Iterable[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """
+    Yields a ZIP archive of storage files as it is built, like stream_zip, for responses served through ASGI.
+    """
+    chunks = stream_zip(storage, entries)
+    # every step runs in the same thread, where the generator and its pool of readers live
+    take = sync_to_async(lambda: next(chunks, None))
+    try:
+        while (chunk := await take()) is not None:
+            yield chunk
+    finally:
+        # a client that disconnects leaves the archive unfinished; closing the generator shuts down its readers
+        await sync_to_async(chunks.close)()
+
+
+def archive_path(scoped_id: int, tag: str, name: str) -> str:
+    """
+    Returns the path of an asset file inside a project archive: <scoped_id>/<tag>.<extension>.
+    """
+    return f"{scoped_id}/{tag}{os.path.splitext(name)[1]}"
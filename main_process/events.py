@@ -0,0 +1,132 @@
+"""
+Live fan-out of project changes to server-sent event streams.
+
+Every committed batch of ProjectChange entries is published once, either on a Redis channel (when
+EVENT_STREAM_REDIS_URL is set) or to the in-process hub. Each worker holds a single ChangeHub with a single
+subscription; the hub loads the changed models once per event and hands the result to every stream open on the
+project, so idle viewers cost a queue each and no thread or query.
+
+Streams are async and need an ASGI server (e.g. gunicorn with uvicorn workers serving backend.asgi).
+"""
+from asgiref.sync import sync_to_async
+from collections import defaultdict
+from django.conf import settings
+from typing import Dict, List, Set
+
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_REDIS_URL = getattr(settings, "EVENT_STREAM_REDIS_URL", None)
+CHANNEL = "morpho:project_changes"
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+_redis = None
+
+
+def publish_changes(project_name: str, changes: List[Dict]):
+    """
+    Publishes committed changes of a project to every worker. Failures are logged and never affect the write.
+    """
+    global _redis
+    try:
+        if EVENT_STREAM_REDIS_URL is not None:
+            if _redis is None:
+                import redis
+                _redis = redis.Redis.from_url(EVENT_STREAM_REDIS_URL)
+            _redis.publish(CHANNEL, json.dumps({"project": project_name, "changes": changes}))
+        else:
+            hub.publish_local(project_name, changes)
+    except Exception:
+        logger.exception("Could not publish changes of project '%s'.", project_name)
+
+
+def _load_models(project_name: str, scoped_ids: Set[int]) -> Dict[int, Dict]:
+    from main_process.models import GeneratedModel, Project
+    from main_process.serializers import GeneratedModelReadOnlySerializer
+
+    project = Project.objects.get(project_name=project_name)
+    models = GeneratedModel.objects.filter(project=project, scoped_id__in=scoped_ids).prefetch_related("files")
+    return {model["scoped_id"]: model for model in GeneratedModelReadOnlySerializer(models, many=True, context={"project": project}).data}
+
+
+class Subscription:
+    def __init__(self, project_name: str):
+        self.project_name = project_name
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        # set when the viewer fell too far behind; its stream ends and the client resumes through Last-Event-ID
+        self.overflowed = False
+
+
+class ChangeHub:
+    """
+    Per-worker registry of open streams, fed by a single subscription to the published changes.
+    """
+
+    def __init__(self):
+        self.subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.listener: asyncio.Task | None = None
+
+    def subscribe(self, project_name: str) -> Subscription:
+        self.loop = asyncio.get_running_loop()
+        if EVENT_STREAM_REDIS_URL is not None and (self.listener is None or self.listener.done()):
+            self.listener = self.loop.create_task(self.listen())
+        subscription = Subscription(project_name)
+        self.subscriptions[project_name].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self.subscriptions.get(subscription.project_name)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if len(subscribers) == 0:
+                del self.subscriptions[subscription.project_name]
+
+    def publish_local(self, project_name: str, changes: List[Dict]):
+        # called from the thread that committed the changes
+        if self.loop is not None and project_name in self.subscriptions:
+            asyncio.run_coroutine_threadsafe(self.dispatch(project_name, changes), self.loop)
+
+    async def listen(self):
+        import redis.asyncio
+
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(EVENT_STREAM_REDIS_URL)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        event = json.loads(message["data"])
+                        if event["project"] in self.subscriptions:
+                            await self.dispatch(event["project"], event["changes"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change subscription failed; reconnecting.")
+                await asyncio.sleep(1)
+
+    async def dispatch(self, project_name: str, changes: List[Dict]):
+        subscribers = list(self.subscriptions.get(project_name, ()))
+        if len(subscribers) == 0:
+            return
+        try:
+            models = await sync_to_async(_load_models)(project_name, {change["scoped_id"] for change in changes})
+        except Exception:
+            logger.exception("Could not load changed models of project '%s'.", project_name)
+            return
+
+        event = {"changes": changes, "models": models, "last_sequence": changes[-1]["sequence"]}
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+
+hub = ChangeHub()
@@ -0,0 +1,216 @@
+"""
+Sparse fieldsets of model responses.
+
+Clients name the parts of a model they need through query parameters:
+    ?fields=scoped_id,parameters   top-level fields of the response
+    ?params=width,height           variable parameters
+    ?outputs=area                  output parameters
+    ?assets=thumbnail              asset tags
+
+The selection prunes the response and is pushed down into the query: selected parameters are extracted from the
+JSON columns by the database, unselected columns are deferred, and asset files are only prefetched (for the
+selected tags) when `files` is part of the response.
+
+Sets of models are named by scoped_id ranges, e.g. `?models=0-99,250,300-310`.
+"""
+from dataclasses import dataclass
+from django.db.models import Case, FloatField, Func, JSONField, Prefetch, Q, QuerySet, When
+from django.db.models.fields.json import KeyTransform, compile_json_path
+from django.db.models.functions import Coalesce, JSONObject
+from rest_framework.exceptions import ValidationError
+from typing import Dict, List, Tuple
+
+from main_process.compact import field_names
+from main_process.models import AssetFile, Project
+
+MODEL_FIELDS = ["id", "scoped_id", "parameters", "output_parameters", "files"]
+
+# annotations holding the selected parameters, extracted by the database
+SELECTED_VALUES = {"parameters": "selected_parameters", "output_parameters": "selected_output_parameters"}
+
+
+def _split(value: str | None) -> List[str] | None:
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip() != ""]
+
+
+def _check(kind: str, selected: List[str] | None, allowed: List[str]):
+    if selected is not None:
+        unknown = [name for name in selected if name not in allowed]
+        if len(unknown) > 0:
+            raise ValidationError(f"Unknown {kind}: {unknown}")
+
+
+@dataclass(frozen=True)
+class FieldSelection:
+    """
+    The parts of a model requested by a client. `None` selects everything.
+    """
+    fields: List[str] | None = None
+    params: List[str] | None = None
+    outputs: List[str] | None = None
+    assets: List[str] | None = None
+
+    @classmethod
+    def from_query(cls, query_params, project: Project) -> "FieldSelection":
+        """
+        Reads a selection from request query parameters, rejecting names that are not part of the project.
+        """
+        selection = cls(
+            fields=_split(query_params.get("fields")),
+            params=_split(query_params.get("params")),
+            outputs=_split(query_params.get("outputs")),
+            assets=_split(query_params.get("assets")),
+        )
+        _check("fields", selection.fields, MODEL_FIELDS)
+        _check("parameters", selection.params, field_names(project.variable_metadata))
+        _check("outputs", selection.outputs, field_names(project.output_metadata))
+        _check("asset tags", selection.assets, [asset["tag"] for asset in project.assets])
+        return selection
+
+    @property
+    def is_empty(self) -> bool:
+        return self.fields is None and self.params is None and self.outputs is None and self.assets is None
+
+    def includes(self, field: str) -> bool:
+        return self.fields is None or field in self.fields
+
+    def names(self, field: str) -> List[str] | None:
+        """
+        Returns the selected names of a model field's values: parameters, output_parameters or files.
+        """
+        return {"parameters": self.params, "output_parameters": self.outputs, "files": self.assets}[field]
+
+
+def field_value(project: Project, metadata: str, column: str, name: str):
+    """
+    Returns an expression extracting one field's value from a JSON column of a project's models.
+    """
+    # values are objects, or arrays in schema order when stored compactly; both are probed since a project's
+    # rows are converted one chunk at a time (see convert_model_storage)
+    position = field_names(getattr(project, metadata)).index(name)
+    return Coalesce(KeyTransform(name, column), KeyTransform(str(position), column))
+
+
+class PresentValue(KeyTransform):
+    """
+    The value under a key of a JSON expression wrapped as {"v": value}, or null if the key is missing; unlike a plain
+    KeyTransform, it tells a JSON null apart from a missing key, and keeps JSON booleans and nulls as such on SQLite.
+    """
+    output_field = JSONField()
+
+    def as_sqlite(self, compiler, connection):
+        lhs, params, key_transforms = self.preprocess_lhs(compiler, connection)
+        path = compile_json_path(key_transforms)
+        return f"(CASE WHEN JSON_TYPE({lhs}, %s) IS NOT NULL THEN JSON_OBJECT('v', {lhs} -> %s) END)", (*params, path, *params, path)
+
+    def as_postgresql(self, compiler, connection):
+        sql, params = super().as_postgresql(compiler, connection)
+        return f"(CASE WHEN {sql} IS NOT NULL THEN JSONB_BUILD_OBJECT('v', {sql}) END)", (*params, *params)
+
+
+class NumericValue(Func):
+    """
+    The value of a JSON expression as a float if it is a JSON number, and null otherwise (nulls, strings, ...).
+    """
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # SQLite extracts JSON numbers as SQL integers or reals
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"(CASE WHEN typeof({sql}) IN ('integer', 'real') THEN {sql} END)", (*params, *params)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"(CASE WHEN jsonb_typeof({sql}) = 'number' THEN ({sql} #>> '{{}}')::double precision END)", (*params, *params)
+
+
+def numeric_field_value(project: Project, metadata: str, column: str, name: str) -> NumericValue:
+    """
+    Returns an expression extracting one numeric field's value from a JSON column of a project's models as a float;
+    models where the value is missing, null or not a number get null.
+    """
+    return NumericValue(field_value(project, metadata, column, name))
+
+
+def _extract(project: Project, metadata: str, column: str, names: List[str]):
+    # see field_value; the values are wrapped, so that the keys a model does not have can be left out (see unwrap)
+    positions = field_names(getattr(project, metadata))
+    values = {name: Coalesce(PresentValue(name, column), PresentValue(str(positions.index(name)), column)) for name in names}
+    # models without values (e.g. not yet evaluated) keep a null instead of an object of nulls
+    return Case(
+        When(**{f"{column}__isnull": False}, then=JSONObject(**values)),
+        output_field=JSONField(),
+    )
+
+
+def select_fields(queryset: QuerySet, project: Project, selection: FieldSelection) -> QuerySet:
+    """
+    Restricts a queryset of a project's models to the columns, JSON keys and asset files of a selection.
+    """
+    deferred = []
+    for column, metadata in (("parameters", "variable_metadata"), ("output_parameters", "output_metadata")):
+        names = selection.names(column)
+        if not selection.includes(column):
+            deferred.append(column)
+        elif names is not None:
+            deferred.append(column)
+            queryset = queryset.annotate(**{SELECTED_VALUES[column]: _extract(project, metadata, column, names)})
+    if len(deferred) > 0:
+        queryset = queryset.defer(*deferred)
+
+    if not selection.includes("files"):
+        queryset = queryset.prefetch_related(None)
+    elif selection.assets is not None:
+        queryset = queryset.prefetch_related(None).prefetch_related(
+            Prefetch("files", queryset=AssetFile.objects.filter(tag__in=selection.assets))
+        )
+    return queryset
+
+
+def unwrap(selected: Dict | None) -> Dict | None:
+    """
+    Turns the values extracted for a selection back into an object of field values, without the missing fields.
+    """
+    if selected is None:
+        return None
+    return {name: value["v"] for name, value in selected.items() if value is not None}
+
+
+def prune(values: Dict | None, names: List[str] | None) -> Dict | None:
+    """
+    Keeps the selected keys of an object of field values.
+    """
+    if values is None or names is None:
+        return values
+    return {name: values[name] for name in names if name in values}
+
+
+def scoped_id_ranges(value: str) -> List[Tuple[int, int]]:
+    """
+    Parses a comma-separated list of scoped_ids and inclusive ranges ("0-99,250") into (first, last) pairs.
+    """
+    ranges = []
+    for item in _split(value):
+        first, _, last = item.partition("-")
+        try:
+            first, last = int(first), int(last) if last != "" else int(first)
+        except ValueError:
+            raise ValidationError(f"'{item}' is neither a scoped_id nor a range of the form first-last.")
+        if first > last:
+            raise ValidationError(f"Range '{item}' is empty.")
+        ranges.append((first, last))
+    return ranges
+
+
+def scoped_id_filter(ranges: List[Tuple[int, int]]) -> Q:
+    """
+    Returns a filter matching the models whose scoped_id lies in any of the ranges.
+    """
+    singles = [first for first, last in ranges if first == last]
+    condition = Q(scoped_id__in=singles) if len(singles) > 0 else Q(pk__in=[])
+    for first, last in ranges:
+        if first != last:
+            condition |= Q(scoped_id__range=(first, last))
+    return condition
@@ -0,0 +1,151 @@
+"""
+Batch ingestion of asset files from a tar or ZIP archive.
+
+Entries are laid out like the archives of the download action, <scoped_id>/<tag>.<extension>, so a downloaded
+archive can be ingested again. The whole archive is checked before anything is written: every entry must name an
+existing model and an asset tag of the project, at most once. Entries are then read one after the other and written
+to the storage backend by a small pool of threads, a bounded number of files behind the reader, so memory holds at
+most that many files. Asset rows are created or pointed at their new file in bulk, in a single transaction.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db import transaction
+from morpho_typing import MorphoAssetCollection
+from rest_framework.exceptions import ValidationError
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from main_process.cache import invalidate_project
+from main_process.models import AssetFile, GeneratedModel, Project, ProjectChange
+
+import logging
+import os
+import tarfile
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+ASSET_WRITE_CONCURRENCY = getattr(settings, "ASSET_WRITE_CONCURRENCY", 4)
+
+
+def _members(file) -> List[Tuple[str, Callable[[], bytes]]]:
+    # (path, reader) of every file in the archive, in archive order
+    file.seek(0)
+    if zipfile.is_zipfile(file):
+        file.seek(0)
+        archive = zipfile.ZipFile(file)
+        return [(info.filename, lambda info=info: archive.read(info)) for info in archive.infolist() if not info.is_dir()]
+    file.seek(0)
+    try:
+        archive = tarfile.open(fileobj=file, mode="r:*")
+    except tarfile.TarError:
+        raise ValidationError("The upload is neither a ZIP nor a tar archive.")
+    return [(member.name, lambda member=member: archive.extractfile(member).read()) for member in archive.getmembers() if member.isfile()]
+
+
+def _parse(path: str) -> Tuple[int, str, str]:
+    parts = path.removeprefix("./").split("/")
+    if len(parts) != 2:
+        raise ValueError("entries must be named <scoped_id>/<tag>.<extension>")
+    tag, extension = os.path.splitext(parts[1])
+    try:
+        scoped_id = int(parts[0])
+    except ValueError:
+        raise ValueError(f"'{parts[0]}' is not a scoped_id")
+    return scoped_id, tag, extension
+
+
+def _save(storage: Storage, name: str, content: bytes) -> str | None:
+    try:
+        return storage.save(name, ContentFile(content))
+    except Exception:
+        logger.exception("Could not write asset file '%s'.", name)
+        return None
+
+
+def _write_behind(storage: Storage, entries: Iterator[Tuple[str, str, Callable[[], bytes]]]) -> Iterator[Tuple[str, str | None]]:
+    # keeps at most ASSET_WRITE_CONCURRENCY writes in flight, yielding (path, stored name) in the original order
+    with ThreadPoolExecutor(max_workers=ASSET_WRITE_CONCURRENCY) as executor:
+        pending = []
+        for path, name, read in entries:
+            pending.append((path, executor.submit(_save, storage, name, read())))
+            if len(pending) >= ASSET_WRITE_CONCURRENCY:
+                path, future = pending.pop(0)
+                yield path, future.result()
+        for path, future in pending:
+            yield path, future.result()
+
+
+def ingest_archive(project: Project, file) -> List[Dict]:
+    """
+    Stores the asset files of an archive and creates or replaces their asset rows.
+
+    Raises ValidationError, with an error per offending entry, if any entry cannot be ingested; nothing is written
+    in that case. Otherwise returns a report entry per archive entry, with the status "created", "replaced" or
+    "failed" (the file could not be written to the storage backend).
+    """
+    members = _members(file)
+    tags = {asset.tag for asset in MorphoAssetCollection(assets=project.assets).assets}
+
+    parsed, errors, seen = {}, [], set()
+    for path, _ in members:
+        try:
+            scoped_id, tag, extension = _parse(path)
+        except ValueError as e:
+            errors.append({"entry": path, "error": str(e)})
+            continue
+        if tag not in tags:
+            errors.append({"entry": path, "error": f"unknown asset tag '{tag}'"})
+        elif (scoped_id, tag) in seen:
+            errors.append({"entry": path, "error": f"more than one file for tag '{tag}' of model {scoped_id}"})
+        else:
+            seen.add((scoped_id, tag))
+            parsed[path] = (scoped_id, tag, extension)
+
+    model_ids = dict(GeneratedModel.objects.filter(
+        project=project, scoped_id__in={scoped_id for scoped_id, _, _ in parsed.values()}
+    ).values_list("scoped_id", "id"))
+    errors += [
+        {"entry": path, "error": f"model {scoped_id} does not exist"}
+        for path, (scoped_id, _, _) in parsed.items() if scoped_id not in model_ids
+    ]
+    if len(errors) > 0:
+        raise ValidationError({"errors": errors})
+    if len(members) == 0:
+        raise ValidationError("The archive is empty.")
+
+    field = AssetFile._meta.get_field("file")
+    entries = (
+        (path, field.generate_filename(None, f"{project.project_name}_{parsed[path][0]}_{parsed[path][1]}{parsed[path][2]}"), read)
+        for path, read in members
+    )
+    stored = dict(_write_behind(field.storage, entries))
+
+    existing = {
+        (asset.generated_model_id, asset.tag): asset
+        for asset in AssetFile.objects.filter(generated_model_id__in=model_ids.values(), tag__in={tag for _, tag, _ in parsed.values()})
+    }
+    created, replaced, report = [], [], []
+    for path, _ in members:
+        scoped_id, tag, _ = parsed[path]
+        if stored[path] is None:
+            report.append({"entry": path, "scoped_id": scoped_id, "tag": tag, "status": "failed"})
+            continue
+        asset = existing.get((model_ids[scoped_id], tag))
+        if asset is None:
+            created.append(AssetFile(file=stored[path], tag=tag, generated_model_id=model_ids[scoped_id]))
+        else:
+            asset.file = stored[path]
+            replaced.append(asset)
+        report.append({"entry": path, "scoped_id": scoped_id, "tag": tag, "status": "created" if asset is None else "replaced"})
+
+    with transaction.atomic():
+        AssetFile.objects.bulk_create(created)
+        AssetFile.objects.bulk_update(replaced, ["file"])
+        # bulk writes do not send post_save
+        ProjectChange.record(project.project_name, [
+            (ProjectChange.Kind.ASSET_UPLOADED, entry["scoped_id"], entry["tag"]) for entry in report if entry["status"] != "failed"
+        ])
+        invalidate_project(project.project_name)
+    return report
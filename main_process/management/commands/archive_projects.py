@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main_process.archival import ARCHIVE_BATCH_SIZE, archive_project
+from main_process.models import Project
+
+
+class Command(BaseCommand):
+    help = "Moves the models and asset rows of deleted projects out of the hot tables into the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("projects", nargs="*", help="Names of deleted projects to archive. Defaults to every deleted project not archived yet.")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Number of models per archive batch.")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.filter(deleted=True)
+        if options["projects"]:
+            projects = projects.filter(project_name__in=options["projects"])
+            missing = set(options["projects"]).difference(projects.values_list("project_name", flat=True))
+            if len(missing) > 0:
+                raise CommandError(f"The following projects do not exist or are not deleted: {sorted(missing)}")
+        else:
+            projects = projects.filter(archived=False)
+
+        for project in projects:
+            count = archive_project(project, batch_size=options["batch_size"])
+            self.stdout.write(f"Archived {count} models of project '{project.project_name}'.")
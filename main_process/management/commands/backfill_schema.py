@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from main_process.backfill import BACKFILL_BATCH_SIZE, run_backfill
+from main_process.models import SchemaBackfill
+
+
+class Command(BaseCommand):
+    help = "Fills the fields appended to project schemas into the existing models, in small batches. Interrupted runs resume where they stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("projects", nargs="*", help="Names of the projects to backfill; all projects with pending backfills if omitted.")
+        parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Number of models updated per transaction.")
+        parser.add_argument("--pause", type=float, default=0.1, help="Seconds to wait between batches.")
+        parser.add_argument("--retry-failed", action="store_true", help="Also rerun backfills that failed before.")
+
+    def handle(self, *args, **options):
+        statuses = [SchemaBackfill.Status.PENDING, SchemaBackfill.Status.RUNNING]
+        if options["retry_failed"]:
+            statuses.append(SchemaBackfill.Status.FAILED)
+        jobs = SchemaBackfill.objects.select_related("project").filter(status__in=statuses)
+        if len(options["projects"]) > 0:
+            jobs = jobs.filter(project_id__in=options["projects"])
+
+        # a project's backfills must run in the order its fields were added, as compact arrays are filled by position
+        failed = set()
+        for job in jobs.order_by("id"):
+            if job.project_id in failed:
+                continue
+            self.stdout.write(f"Backfilling schema version {job.schema_version} of project '{job.project_id}'.")
+            try:
+                changed = run_backfill(job, batch_size=options["batch_size"], pause=options["pause"], log=self.stdout.write)
+            except IntegrityError:
+                failed.add(job.project_id)
+                self.stderr.write(job.error)
+                continue
+            self.stdout.write(f"Updated {changed} models of project '{job.project_id}'.")
+
+        if len(failed) > 0:
+            raise CommandError(f"Backfills failed for projects: {sorted(failed)}")
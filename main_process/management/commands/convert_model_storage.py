@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from main_process.compact import compact_values, expand_values, field_names
+from main_process.models import GeneratedModel, Project, parameter_fingerprint
+
+
+class Command(BaseCommand):
+    help = "Switches a project between compact (schema-ordered array) and object storage of model values, converting existing models in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project", help="Name of the project.")
+        parser.add_argument("--expand", action="store_true", help="Convert back from compact arrays to objects.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Number of models converted per transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(project_name=options["project"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project '{options['project']}' does not exist.")
+
+        # flip the mode first so that new writes already use it; reads handle both forms while rows are mixed
+        project.compact_storage = not options["expand"]
+        project.save(update_fields=["compact_storage"])
+
+        variable_names, output_names = field_names(project.variable_metadata), field_names(project.output_metadata)
+        if options["expand"]:
+            convert = lambda model: (expand_values(variable_names, model.parameters), expand_values(output_names, model.output_parameters))
+        else:
+            convert = lambda model: (compact_values(project.variable_metadata, model.parameters), compact_values(project.output_metadata, model.output_parameters))
+
+        def fingerprint(parameters):
+            # compacting casts values to their fields' types, which can change the fingerprint of a model
+            record = compact_values(project.variable_metadata, expand_values(variable_names, parameters))
+            return parameter_fingerprint(record)
+
+        queryset = GeneratedModel.objects.filter(project=project).only("id", "scoped_id", "parameters", "output_parameters", "parameter_hash").order_by("id")
+        last_id, converted, skipped = 0, 0, []
+        while True:
+            with transaction.atomic():
+                chunk = list(queryset.select_for_update().filter(id__gt=last_id)[:options["chunk_size"]])
+                if len(chunk) == 0:
+                    break
+                hashes = {}
+                for model in chunk:
+                    model.parameters, model.output_parameters = convert(model)
+                    hashes[model.id] = fingerprint(model.parameters)
+                taken = dict(
+                    GeneratedModel.objects.filter(project=project, parameter_hash__in=hashes.values())
+                    .exclude(id__in=hashes.keys()).values_list("parameter_hash", "scoped_id")
+                )
+                updated = []
+                for model in chunk:
+                    if hashes[model.id] in taken:
+                        # the model is left as it is; reads handle both forms
+                        skipped.append((model.scoped_id, taken[hashes[model.id]]))
+                        continue
+                    taken[hashes[model.id]] = model.scoped_id
+                    model.parameter_hash = hashes[model.id]
+                    updated.append(model)
+                GeneratedModel.objects.bulk_update(updated, ["parameters", "output_parameters", "parameter_hash"])
+            last_id = chunk[-1].id
+            converted += len(updated)
+            self.stdout.write(f"Converted {converted} models.")
+
+        for scoped_id, duplicate_of in skipped:
+            self.stderr.write(f"Skipped model {scoped_id}: its converted parameters are those of model {duplicate_of}.")
+
+        # bulk updates do not send post_save; saving the project invalidates its cached reads
+        project.save(update_fields=["compact_storage"])
+        self.stdout.write(f"Project '{project.project_name}' now uses {'object' if options['expand'] else 'compact'} storage.")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main_process.partitioning import TABLE, partition_table
+
+
+class Command(BaseCommand):
+    help = f"Converts the {TABLE} table into a PostgreSQL table partitioned by project. Writes to the table wait until the conversion is done."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000, help="Number of rows copied per statement.")
+        parser.add_argument("--database", default="default", help="Database alias to convert.")
+        parser.add_argument("--dry-run", action="store_true", help="Print the statements instead of executing them.")
+
+    def handle(self, *args, **options):
+        try:
+            statements = partition_table(
+                batch_size=options["batch_size"], using=options["database"], execute=not options["dry_run"], log=self.stdout.write
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if options["dry_run"]:
+            for statement in statements:
+                self.stdout.write(f"{statement};")
+        else:
+            self.stdout.write(
+                f"{TABLE} is now partitioned by project; the old table was kept as {TABLE}_unpartitioned. Restart the workers."
+            )
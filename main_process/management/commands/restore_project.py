@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main_process.archival import restore_project
+from main_process.models import Project
+
+
+class Command(BaseCommand):
+    help = "Moves the archived models and asset rows of a project back into the hot tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project", help="Name of the archived project.")
+        parser.add_argument("--keep-deleted", action="store_true", help="Restore the rows but leave the project flagged as deleted.")
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(project_name=options["project"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project '{options['project']}' does not exist.")
+
+        count = restore_project(project, undelete=not options["keep_deleted"])
+        self.stdout.write(f"Restored {count} models of project '{project.project_name}'.")
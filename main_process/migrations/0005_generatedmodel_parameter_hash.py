@@ -0,0 +1,103 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from hashlib import sha256
+from morpho_typing import MorphoBaseType
+
+import json
+
+
+def cast_value(field: dict, value):
+    # the schema validates leniently, so stored values may be in another form than their field's type (e.g. "0.1")
+    if value is None:
+        return None
+    try:
+        return MorphoBaseType(field["field_type"]).native_type(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def parameter_fingerprint(record: list) -> str:
+    # frozen copy of main_process.models.parameter_fingerprint; the migration has to keep hashing as it did when written
+    canonical = [
+        float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+        for value in record
+    ]
+    return sha256(json.dumps(canonical, separators=(",", ":")).encode()).hexdigest()
+
+
+def fingerprinted_models(GeneratedModel, project):
+    # yields batches of the project's models, each with its parameter_hash set but not saved; values are cast to
+    # their fields' types first, as the serializer does before fingerprinting
+    fields = project.variable_metadata
+    queryset = GeneratedModel.objects.filter(project=project).only("id", "scoped_id", "parameters").order_by("id")
+    last_id, batch = None, True
+    while batch:
+        batch = list((queryset if last_id is None else queryset.filter(id__gt=last_id))[:1000])
+        for model in batch:
+            model.parameter_hash = parameter_fingerprint([cast_value(field, model.parameters.get(field["field_name"])) for field in fields])
+        if batch:
+            last_id = batch[-1].id
+            yield batch
+
+
+def check_duplicate_parameters(apps, schema_editor):
+    # runs before anything is written: the migration is not atomic, so failing halfway would leave it half applied
+    Project = apps.get_model("main_process", "Project")
+    GeneratedModel = apps.get_model("main_process", "GeneratedModel")
+
+    duplicates = []
+    for project in Project.objects.all():
+        first = {}
+        for batch in fingerprinted_models(GeneratedModel, project):
+            for model in batch:
+                scoped_id = first.setdefault(model.parameter_hash, model.scoped_id)
+                if scoped_id != model.scoped_id:
+                    duplicates.append(f"{project.project_name}: model {model.scoped_id} repeats the parameters of model {scoped_id}")
+    if duplicates:
+        raise RuntimeError(
+            "Models with the same parameters in a project must be removed before parameters can be made unique:\n"
+            + "\n".join(duplicates)
+        )
+
+
+def fill_parameter_hash(apps, schema_editor):
+    Project = apps.get_model("main_process", "Project")
+    GeneratedModel = apps.get_model("main_process", "GeneratedModel")
+
+    for project in Project.objects.all():
+        for batch in fingerprinted_models(GeneratedModel, project):
+            GeneratedModel.objects.bulk_update(batch, ["parameter_hash"])
+
+
+class Migration(migrations.Migration):
+    # the backfill runs in batches; keeping it out of the ALTER TABLE transaction avoids pending trigger events
+    atomic = False
+
+    dependencies = [
+        ('main_process', '0004_markdowndocument_projectmetadata_human_name_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_parameters, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='generatedmodel',
+            name='parameter_hash',
+            field=models.CharField(editable=False, help_text='fingerprint of the schema-ordered parameter vector; see parameter_fingerprint', max_length=64, null=True),
+        ),
+        migrations.RunPython(fill_parameter_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='generatedmodel',
+            name='parameter_hash',
+            field=models.CharField(editable=False, help_text='fingerprint of the schema-ordered parameter vector; see parameter_fingerprint', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='generatedmodel',
+            name='parameters',
+            field=models.JSONField(help_text='set of variable parameters and their values'),
+        ),
+        migrations.AddConstraint(
+            model_name='generatedmodel',
+            constraint=models.UniqueConstraint(fields=('project', 'parameter_hash'), name='unique_parameters_per_project'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_process', '0005_generatedmodel_parameter_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='generatedmodel',
+            index=models.Index(fields=['project', 'scoped_id'], name='generated_model_scoped_id_idx'),
+        ),
+    ]
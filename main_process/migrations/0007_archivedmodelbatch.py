@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_process', '0006_generatedmodel_scoped_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='archived',
+            field=models.BooleanField(default=False, help_text='Models of the project were moved to the archive'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedModelBatch',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('model_count', models.IntegerField(help_text='Number of models in the batch')),
+                ('payload', models.BinaryField(help_text='Compressed rows of the batch')),
+                ('creation_date', models.DateTimeField(auto_now_add=True, help_text='Date of Archival')),
+                ('project', models.ForeignKey(help_text='Foreign Key to Associated Project', on_delete=django.db.models.deletion.CASCADE, related_name='archived_batches', to='main_process.project')),
+            ],
+            options={
+                'db_table': 'archived_model_batch',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_process', '0007_archivedmodelbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedmodel',
+            name='schema_version',
+            field=models.PositiveIntegerField(default=1, help_text='schema version of the project when the values were written'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='compact_storage',
+            field=models.BooleanField(default=False, help_text='Store model values as arrays in schema order'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='schema_version',
+            field=models.PositiveIntegerField(default=1, help_text='Incremented whenever fields are added to the schema'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_process', '0008_compact_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectChange',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('sequence', models.BigIntegerField(help_text="Position of the change in the project's change log")),
+                ('kind', models.CharField(choices=[('model_created', 'Model Created'), ('model_updated', 'Model Updated'), ('model_deleted', 'Model Deleted'), ('asset_uploaded', 'Asset Uploaded'), ('asset_deleted', 'Asset Deleted')], help_text='Kind of change', max_length=20)),
+                ('scoped_id', models.IntegerField(help_text='scoped_id of the changed model')),
+                ('tag', models.CharField(blank=True, help_text='Asset tag, for asset changes', max_length=30, null=True)),
+                ('creation_date', models.DateTimeField(auto_now_add=True, help_text='Date of the change')),
+                ('project', models.ForeignKey(help_text='Foreign Key to Associated Project', on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='main_process.project')),
+            ],
+            options={
+                'db_table': 'project_change',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='projectchange',
+            constraint=models.UniqueConstraint(fields=('project', 'sequence'), name='unique_change_sequence_per_project'),
+        ),
+    ]
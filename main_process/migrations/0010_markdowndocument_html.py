@@ -0,0 +1,45 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from hashlib import sha256
+
+import markdown
+import nh3
+
+
+def render_documents(apps, schema_editor):
+    # frozen copy of main_process.rendering as it was when written, without the render cache: a migration must not
+    # depend on live code nor write to a cache the running servers read
+    MarkdownDocument = apps.get_model("main_process", "MarkdownDocument")
+    rendered, batch = {}, []
+    for document in MarkdownDocument.objects.all().iterator():
+        document.content_hash = sha256(document.text.encode()).hexdigest()
+        if document.content_hash not in rendered:
+            rendered[document.content_hash] = nh3.clean(markdown.markdown(document.text, extensions=["extra", "sane_lists"]))
+        document.html = rendered[document.content_hash]
+        batch.append(document)
+        if len(batch) >= 500:
+            MarkdownDocument.objects.bulk_update(batch, ["html", "content_hash"])
+            batch = []
+    MarkdownDocument.objects.bulk_update(batch, ["html", "content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_process', '0009_projectchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='markdowndocument',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Hash of the text the HTML was rendered from', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='markdowndocument',
+            name='html',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Sanitized HTML rendering of the text'),
+        ),
+        migrations.RunPython(render_documents, migrations.RunPython.noop),
+    ]
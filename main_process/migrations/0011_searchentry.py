@@ -0,0 +1,70 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:33
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+SEARCH_CONFIG = "english"
+
+
+def build_index(apps, schema_editor):
+    # frozen copy of main_process.search.rebuild_index, on the models as they are at this migration
+    Project = apps.get_model("main_process", "Project")
+    ProjectMetadata = apps.get_model("main_process", "ProjectMetadata")
+    MarkdownDocument = apps.get_model("main_process", "MarkdownDocument")
+    SearchEntry = apps.get_model("main_process", "SearchEntry")
+
+    entries = []
+    for project in Project.objects.filter(deleted=False).only("project_name"):
+        metadata = ProjectMetadata.objects.filter(project_id=project.project_name).first()
+        title, body = project.project_name, []
+        if metadata is not None:
+            title = f"{metadata.human_name} ({project.project_name})" if metadata.human_name not in ("", project.project_name) else title
+            if isinstance(metadata.captions, list):
+                body += [caption.get("display_name", "") for caption in metadata.captions if isinstance(caption, dict)]
+            description = MarkdownDocument.objects.filter(pk=metadata.description_id).values_list("text", flat=True).first()
+            if description is not None:
+                body.append(description)
+        entries.append(SearchEntry(kind="project", key=project.project_name, title=title, body="\n".join(body)))
+    for slug, text in MarkdownDocument.objects.values_list("slug", "text").iterator():
+        entries.append(SearchEntry(kind="document", key=slug, title=slug, body=text))
+    SearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+    if schema_editor.connection.vendor == "postgresql":
+        SearchEntry.objects.update(
+            search_vector=SearchVector("title", weight="A", config=SEARCH_CONFIG) + SearchVector("body", weight="B", config=SEARCH_CONFIG)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_process', '0010_markdowndocument_html'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('document', 'Document')], help_text='Kind of the searchable object', max_length=10)),
+                ('key', models.TextField(help_text='project_name or slug of the searchable object')),
+                ('title', models.TextField(help_text='Name the object is displayed and matched by')),
+                ('body', models.TextField(blank=True, help_text='Remaining searchable text')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(help_text='Weighted full-text vector of title and body (PostgreSQL only)', null=True)),
+            ],
+            options={
+                'db_table': 'search_entry',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_entry_vector_idx'), django.contrib.postgres.indexes.GinIndex(fields=['title'], name='search_entry_title_trgm_idx', opclasses=['gin_trgm_ops'])],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'key'), name='unique_search_entry'),
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
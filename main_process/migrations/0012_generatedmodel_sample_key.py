@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:40
+
+from django.db import migrations, models
+import random
+
+
+def randomize_sample_keys(apps, schema_editor):
+    # AddField gives every existing row the same default; each row needs its own random key
+    connection = schema_editor.connection
+    table = connection.ops.quote_name("generated_model")
+    if connection.vendor == "postgresql":
+        expression = "random()"
+    else:
+        # sqlite's random() is a 64-bit integer
+        expression = "(random() / 18446744073709551616.0 + 0.5)"
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        for first in range(low, high + 1, 10000):
+            cursor.execute(f"UPDATE {table} SET sample_key = {expression} WHERE id >= %s AND id < %s", [first, first + 10000])
+
+
+class Migration(migrations.Migration):
+    # the keys are written in ranges of ids, each committed on its own, so no transaction locks the whole table
+    atomic = False
+
+    dependencies = [
+        ('main_process', '0011_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedmodel',
+            name='sample_key',
+            field=models.FloatField(default=random.random, editable=False, help_text='uniformly random key in [0, 1) to draw samples by; see main_process.sampling'),
+        ),
+        migrations.RunPython(randomize_sample_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='generatedmodel',
+            index=models.Index(fields=['project', 'sample_key'], name='generated_model_sample_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_process', '0012_generatedmodel_sample_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchemaBackfill',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('schema_version', models.PositiveIntegerField(help_text='Schema version the models are brought to')),
+                ('defaults', models.JSONField(help_text="Values of the added fields: {'parameters': {...}, 'output_parameters': {...}}")),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('max_id', models.BigIntegerField(help_text='Largest model id when the fields were added')),
+                ('last_id', models.BigIntegerField(default=0, help_text='Largest model id backfilled so far')),
+                ('processed', models.BigIntegerField(default=0, help_text='Number of models backfilled so far')),
+                ('error', models.TextField(blank=True, default='')),
+                ('creation_date', models.DateTimeField(auto_now_add=True)),
+                ('update_date', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(help_text='Foreign Key to Associated Project', on_delete=django.db.models.deletion.CASCADE, related_name='schema_backfills', to='main_process.project')),
+            ],
+            options={
+                'db_table': 'schema_backfill',
+            },
+        ),
+    ]
@@ -1,10 +1,18 @@
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models import Max, UniqueConstraint
+from django.db.models.signals import post_delete, post_save
 from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.dispatch import receiver
+from main_process.cache import invalidate_project
+from main_process.events import publish_changes
+from main_process.rendering import content_hash, render_markdown
 from pydantic import BaseModel, ConfigDict
-from typing import List, Dict
+from typing import List, Dict, Iterable, Tuple
 from uuid import uuid4
+from hashlib import sha256
+import json
+import random
 
 
 class MarkdownDocument(models.Model):
@@ -13,6 +21,18 @@ class MarkdownDocument(models.Model):
     """
     slug = models.TextField(help_text="Identifies the document", blank=False, unique=True, primary_key=True)
     text = models.TextField(help_text="Markdown text", blank=True)
+    html = models.TextField(help_text="Sanitized HTML rendering of the text", blank=True, default="", editable=False)
+    content_hash = models.CharField(max_length=64, help_text="Hash of the text the HTML was rendered from", blank=True, default="", editable=False)
+
+    def save(self, *args, **kwargs):
+        # render once per change of the text, see main_process.rendering
+        text_hash = content_hash(self.text)
+        if text_hash != self.content_hash:
+            self.html = render_markdown(self.text)
+            self.content_hash = text_hash
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "html", "content_hash"}
+        super().save(*args, **kwargs)
 
 
 class Project(models.Model):
@@ -44,25 +64,51 @@ class Project(models.Model):
     output_metadata = models.JSONField(help_text="Set of output parameters and their units", blank=False)
     assets = models.JSONField(help_text="Set of asset names", blank=False)
     deleted = models.BooleanField(default=False, blank=False)
+    archived = models.BooleanField(default=False, blank=False, help_text="Models of the project were moved to the archive")
+    compact_storage = models.BooleanField(default=False, blank=False, help_text="Store model values as arrays in schema order")
+    schema_version = models.PositiveIntegerField(default=1, help_text="Incremented whenever fields are added to the schema")
     # add user foreign key later here
 
     def __str__(self) -> str:
         return self.project_name
 
 
+def parameter_fingerprint(record: list) -> str:
+    """
+    Hashes a parameter vector arranged in the order of its project's schema.
+    Numbers are hashed by value, so 1 and 1.0 share a fingerprint.
+    """
+    canonical = [
+        float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+        for value in record
+    ]
+    return sha256(json.dumps(canonical, separators=(",", ":")).encode()).hexdigest()
+
+
 class GeneratedModel(models.Model):
     class Meta:
         db_table = "generated_model"
-        indexes = [GinIndex(fields=['parameters'])]
+        indexes = [
+            GinIndex(fields=['parameters']),
+            models.Index(fields=["project", "scoped_id"], name="generated_model_scoped_id_idx"),
+            models.Index(fields=["project", "sample_key"], name="generated_model_sample_idx"),
+        ]
+        constraints = [
+            UniqueConstraint(fields=["project", "parameter_hash"], name="unique_parameters_per_project")
+        ]
 
     id = models.BigAutoField(primary_key=True, editable=False)
     scoped_id = models.IntegerField(blank=False)
-    parameters = models.JSONField(help_text="set of variable parameters and their values", unique=True)
+    parameters = models.JSONField(help_text="set of variable parameters and their values")
+    parameter_hash = models.CharField(max_length=64, editable=False, help_text="fingerprint of the schema-ordered parameter vector; see parameter_fingerprint")
     output_parameters = models.JSONField(help_text="set of output parameters and their values", blank=True, null=True)
+    schema_version = models.PositiveIntegerField(default=1, help_text="schema version of the project when the values were written")
+    sample_key = models.FloatField(default=random.random, editable=False, help_text="uniformly random key in [0, 1) to draw samples by; see main_process.sampling")
     project = models.ForeignKey(Project, to_field="project_name", on_delete=models.PROTECT, help_text="Foreign Key to Associated Project", blank=False)
 
     def __str__(self) -> str:
-        return str(self.parameters | self.output_parameters) + ' -> ' + str(self.project)
+        # shown for every row of the admin changelist, so it avoids the parameter values
+        return str(self.project_id) + ' #' + str(self.scoped_id)
 
 
 class AssetFile(models.Model):
@@ -75,6 +121,136 @@ class AssetFile(models.Model):
         return self.tag + ' -> ' + str(self.generated_model)
 
 
+class ArchivedModelBatch(models.Model):
+    """
+    A batch of generated models, along with their asset file rows, moved out of the hot tables once their project was deleted.
+
+    `payload` holds the zlib-compressed JSON form of the rows: {"models": [...], "files": [...]}.
+    The asset files themselves stay in storage.
+    """
+    class Meta:
+        db_table = "archived_model_batch"
+
+    id = models.BigAutoField(primary_key=True, editable=False)
+    project = models.ForeignKey(Project, to_field="project_name", on_delete=models.CASCADE, help_text="Foreign Key to Associated Project", related_name="archived_batches")
+    model_count = models.IntegerField(help_text="Number of models in the batch")
+    payload = models.BinaryField(help_text="Compressed rows of the batch")
+    creation_date = models.DateTimeField(auto_now_add=True, help_text="Date of Archival")
+
+
+class ProjectChange(models.Model):
+    """
+    An entry of a project's append-only change log.
+
+    `sequence` increases monotonically within a project, in commit order, so a client that has seen every change up
+    to some sequence number can catch up by fetching only the changes after it.
+    """
+    class Kind(models.TextChoices):
+        MODEL_CREATED = "model_created"
+        MODEL_UPDATED = "model_updated"
+        MODEL_DELETED = "model_deleted"
+        ASSET_UPLOADED = "asset_uploaded"
+        ASSET_DELETED = "asset_deleted"
+
+    class Meta:
+        db_table = "project_change"
+        constraints = [
+            UniqueConstraint(fields=["project", "sequence"], name="unique_change_sequence_per_project")
+        ]
+
+    id = models.BigAutoField(primary_key=True, editable=False)
+    project = models.ForeignKey(Project, to_field="project_name", on_delete=models.CASCADE, help_text="Foreign Key to Associated Project", related_name="changes")
+    sequence = models.BigIntegerField(help_text="Position of the change in the project's change log")
+    kind = models.CharField(max_length=20, choices=Kind.choices, help_text="Kind of change")
+    scoped_id = models.IntegerField(help_text="scoped_id of the changed model")
+    tag = models.CharField(max_length=30, blank=True, null=True, help_text="Asset tag, for asset changes")
+    creation_date = models.DateTimeField(auto_now_add=True, help_text="Date of the change")
+
+    @classmethod
+    def record(cls, project_name: str, entries: Iterable[Tuple[str, int, str | None]]):
+        """
+        Appends (kind, scoped_id, tag) entries to a project's change log, within the transaction making the change.
+
+        The project row stays locked until that transaction commits, so sequence numbers are handed out in commit
+        order and a reader never sees a sequence number before the ones below it.
+        """
+        entries = list(entries)
+        if len(entries) == 0:
+            return
+        with transaction.atomic():
+            # FOR NO KEY UPDATE does not block the foreign key checks of concurrent inserts referencing the project
+            list(Project.objects.select_for_update(no_key=True).filter(project_name=project_name).values_list("pk"))
+            last = cls.objects.filter(project_id=project_name).aggregate(last=Max("sequence"))["last"] or 0
+            changes = cls.objects.bulk_create([
+                cls(project_id=project_name, sequence=last + offset, kind=kind, scoped_id=scoped_id, tag=tag)
+                for offset, (kind, scoped_id, tag) in enumerate(entries, start=1)
+            ])
+            payload = [
+                {"sequence": change.sequence, "kind": change.kind, "scoped_id": change.scoped_id, "tag": change.tag}
+                for change in changes
+            ]
+            transaction.on_commit(lambda: publish_changes(project_name, payload))
+
+
+class SchemaBackfill(models.Model):
+    """
+    A pending fill of the fields appended to a project's schema into the project's existing models.
+
+    Created when fields are added to a project; run by the `backfill_schema` command (see main_process.backfill).
+    Models up to `max_id` existed before the change; `last_id` records how far the backfill got, so an interrupted
+    run resumes where it stopped.
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    class Meta:
+        db_table = "schema_backfill"
+
+    id = models.BigAutoField(primary_key=True, editable=False)
+    project = models.ForeignKey(Project, to_field="project_name", on_delete=models.CASCADE, help_text="Foreign Key to Associated Project", related_name="schema_backfills")
+    schema_version = models.PositiveIntegerField(help_text="Schema version the models are brought to")
+    defaults = models.JSONField(help_text="Values of the added fields: {'parameters': {...}, 'output_parameters': {...}}")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    max_id = models.BigIntegerField(help_text="Largest model id when the fields were added")
+    last_id = models.BigIntegerField(default=0, help_text="Largest model id backfilled so far")
+    processed = models.BigIntegerField(default=0, help_text="Number of models backfilled so far")
+    error = models.TextField(blank=True, default="")
+    creation_date = models.DateTimeField(auto_now_add=True)
+    update_date = models.DateTimeField(auto_now=True)
+
+
+class SearchEntry(models.Model):
+    """
+    A searchable text of a project or a markdown document, kept up to date on save (see main_process.search).
+
+    Project entries combine the project name, human name, caption display names and description text;
+    document entries hold a document's text.
+    """
+    class Kind(models.TextChoices):
+        PROJECT = "project"
+        DOCUMENT = "document"
+
+    class Meta:
+        db_table = "search_entry"
+        indexes = [
+            GinIndex(fields=["search_vector"], name="search_entry_vector_idx"),
+            GinIndex(fields=["title"], name="search_entry_title_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
+        constraints = [
+            UniqueConstraint(fields=["kind", "key"], name="unique_search_entry")
+        ]
+
+    id = models.BigAutoField(primary_key=True, editable=False)
+    kind = models.CharField(max_length=10, choices=Kind.choices, help_text="Kind of the searchable object")
+    key = models.TextField(help_text="project_name or slug of the searchable object")
+    title = models.TextField(help_text="Name the object is displayed and matched by")
+    body = models.TextField(help_text="Remaining searchable text", blank=True)
+    search_vector = SearchVectorField(null=True, help_text="Weighted full-text vector of title and body (PostgreSQL only)")
+
+
 class Caption(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     tag_name: str
@@ -84,6 +260,14 @@ class Document(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     slug: str
     text: str
+    html: str = ""
+
+@receiver(post_save, sender=Project)
+def create_project_partition(sender, instance: Project, created=False, **kwargs):
+    if created:
+        from main_process.partitioning import create_partition, is_partitioned
+        if is_partitioned():
+            create_partition(instance.project_name)
 
 @receiver(post_save, sender=Project)
 def create_metadata(sender, instance: Project, created=False, **kwargs):
@@ -103,3 +287,87 @@ class ProjectMetadata(models.Model):
     captions = models.JSONField(help_text="Set of captions to be displayed for the project", default="{}")
     description = models.ForeignKey(MarkdownDocument, on_delete=models.DO_NOTHING, help_text="Markdown description of the project")
     human_name = models.TextField(help_text="Human readable name of the project.", default="")
+
+
+# Project-scoped cache invalidation: a write only drops the cached reads of the project it touches.
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectMetadata)
+def invalidate_project_cache(sender, instance, **kwargs):
+    invalidate_project(instance.pk)
+
+
+@receiver(post_save, sender=MarkdownDocument)
+def invalidate_description_cache(sender, instance: MarkdownDocument, **kwargs):
+    for project_name in ProjectMetadata.objects.filter(description=instance).values_list("project_id", flat=True):
+        invalidate_project(project_name)
+
+
+@receiver(post_save, sender=GeneratedModel)
+@receiver(post_delete, sender=GeneratedModel)
+def invalidate_model_cache(sender, instance: GeneratedModel, **kwargs):
+    invalidate_project(instance.project_id)
+
+
+def _asset_model_keys(instance: AssetFile) -> Tuple[str, int]:
+    # (project_id, scoped_id) of the asset's model, without loading the model; kept on the instance for the other receivers
+    keys = getattr(instance, "_model_keys", None)
+    if keys is None or keys[0] != instance.generated_model_id:
+        if AssetFile.generated_model.is_cached(instance):
+            values = (instance.generated_model.project_id, instance.generated_model.scoped_id)
+        else:
+            values = GeneratedModel.objects.filter(id=instance.generated_model_id).values_list("project_id", "scoped_id").get()
+        keys = instance._model_keys = (instance.generated_model_id, values)
+    return keys[1]
+
+
+@receiver(post_save, sender=AssetFile)
+@receiver(post_delete, sender=AssetFile)
+def invalidate_asset_cache(sender, instance: AssetFile, **kwargs):
+    project_id, _ = _asset_model_keys(instance)
+    invalidate_project(project_id)
+
+
+# Search: the entries of projects and documents are rewritten with them, see main_process.search.
+
+@receiver(post_save, sender=Project)
+def update_project_search_entry(sender, instance: Project, **kwargs):
+    from main_process.search import index_project
+    index_project(instance.project_name)
+
+
+@receiver(post_save, sender=ProjectMetadata)
+def update_metadata_search_entry(sender, instance: ProjectMetadata, **kwargs):
+    from main_process.search import index_project
+    index_project(instance.project_id)
+
+
+@receiver(post_save, sender=MarkdownDocument)
+def update_document_search_entry(sender, instance: MarkdownDocument, **kwargs):
+    from main_process.search import index_document
+    index_document(instance)
+
+
+# Change log: every write to a model or an asset is appended to its project's change log.
+
+@receiver(post_save, sender=GeneratedModel)
+def record_model_saved(sender, instance: GeneratedModel, created=False, **kwargs):
+    kind = ProjectChange.Kind.MODEL_CREATED if created else ProjectChange.Kind.MODEL_UPDATED
+    ProjectChange.record(instance.project_id, [(kind, instance.scoped_id, None)])
+
+
+@receiver(post_delete, sender=GeneratedModel)
+def record_model_deleted(sender, instance: GeneratedModel, **kwargs):
+    ProjectChange.record(instance.project_id, [(ProjectChange.Kind.MODEL_DELETED, instance.scoped_id, None)])
+
+
+@receiver(post_save, sender=AssetFile)
+def record_asset_saved(sender, instance: AssetFile, **kwargs):
+    project_id, scoped_id = _asset_model_keys(instance)
+    ProjectChange.record(project_id, [(ProjectChange.Kind.ASSET_UPLOADED, scoped_id, instance.tag)])
+
+
+@receiver(post_delete, sender=AssetFile)
+def record_asset_deleted(sender, instance: AssetFile, **kwargs):
+    project_id, scoped_id = _asset_model_keys(instance)
+    ProjectChange.record(project_id, [(ProjectChange.Kind.ASSET_DELETED, scoped_id, instance.tag)])
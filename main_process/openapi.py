@@ -0,0 +1,61 @@
+"""
+Cached OpenAPI schema.
+
+Generating the schema introspects every view and serializer, so it is done at most once per process: the first
+request builds the schema and renders it, later requests get the rendered document from memory. Code changes mean
+a restart, which starts over with an empty cache. Responses carry an ETag of the document, so clients that already
+hold it get a 304.
+
+Setting OPENAPI_SCHEMA_FILE to a schema built ahead of time (`python manage.py spectacular --file <path>`) serves
+that file instead of generating the schema at all.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from hashlib import sha256
+from typing import Dict, Tuple
+
+import threading
+import yaml
+
+OPENAPI_SCHEMA_FILE = getattr(settings, "OPENAPI_SCHEMA_FILE", None)
+
+# (version, language, media type) -> (rendered schema, ETag)
+_documents: Dict[Tuple, Tuple[bytes, str]] = {}
+_lock = threading.Lock()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        language = request.GET.get("lang") if settings.USE_I18N else None
+        key = (version, language, renderer.media_type)
+
+        if key not in _documents:
+            with _lock:
+                # another thread may have built it while this one waited
+                if key not in _documents:
+                    _documents[key] = self.build(request, renderer, *args, **kwargs)
+        content, etag = _documents[key]
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type
+            response = HttpResponse(content, content_type=content_type)
+            response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, version)}"'
+        response["ETag"] = etag
+        return response
+
+    def build(self, request, renderer, *args, **kwargs) -> Tuple[bytes, str]:
+        if OPENAPI_SCHEMA_FILE is not None:
+            with open(OPENAPI_SCHEMA_FILE, "rb") as file:
+                # JSON is valid YAML, so a schema built in either format loads
+                schema = yaml.safe_load(file)
+        else:
+            schema = super().get(request, *args, **kwargs).data
+        content = renderer.render(schema, renderer.media_type, {"request": request, "view": self})
+        return content, f'"{sha256(content).hexdigest()}"'
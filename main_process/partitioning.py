@@ -0,0 +1,182 @@
+"""
+Declarative partitioning of the generated_model table by project (Postgres only).
+
+Every query on generated models is scoped by project, so a LIST partition per project keeps vacuum, index bloat
+and the per-project uniqueness check proportional to the project instead of the largest project. A DEFAULT
+partition catches rows of projects whose partition does not exist yet.
+
+Partitioned tables require their unique keys to contain the partition key. The converted table therefore has the
+primary key (id, project_id), and foreign keys referencing generated_model.id are dropped; Django still uses `id`
+alone to address rows, which stays unique through its sequence.
+
+The conversion is performed once through the `partition_models` management command. Afterwards, partitions are
+created with new projects, and archiving a deleted project drops its partition instead of deleting row by row.
+Workers started before the conversion do not create partitions, so their projects' rows land in the DEFAULT
+partition; creating such a project's partition later moves its rows over.
+"""
+from django.db import connections, transaction
+from hashlib import sha1
+from typing import Callable, List
+
+from main_process.models import GeneratedModel, Project
+
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+TABLE = GeneratedModel._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+_partitioned = {}
+
+
+def partition_name(project_name: str) -> str:
+    """
+    Returns the table name of a project's partition. Project names are free text, so they are hashed.
+    """
+    return f"{TABLE}_p_{sha1(project_name.encode()).hexdigest()[:16]}"
+
+
+def is_partitioned(using: str = "default") -> bool:
+    """
+    Returns whether generated_model is a partitioned table. The answer is cached for the lifetime of the process;
+    restart the workers after converting the table.
+    """
+    if using not in _partitioned:
+        connection = connections[using]
+        if connection.vendor != "postgresql":
+            _partitioned[using] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE])
+                _partitioned[using] = cursor.fetchone() is not None
+    return _partitioned[using]
+
+
+def create_partition(project_name: str, using: str = "default"):
+    """
+    Creates the partition of a project, moving any rows of the project out of the DEFAULT partition into it.
+    """
+    name = partition_name(project_name)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s), to_regclass(%s)", [name, DEFAULT_PARTITION])
+        exists, has_default = (value is not None for value in cursor.fetchone())
+        if exists:
+            return
+        moved = False
+        if has_default:
+            # Postgres refuses to create a partition for values the DEFAULT partition already holds
+            cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN EXCLUSIVE MODE')
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE project_id = %s)', [project_name])
+            moved = cursor.fetchone()[0]
+        if moved:
+            logger.info("Moving the models of project '%s' out of the default partition.", project_name)
+            cursor.execute(f'CREATE TEMPORARY TABLE "{name}_moved" AS SELECT * FROM "{DEFAULT_PARTITION}" WHERE project_id = %s', [project_name])
+            cursor.execute(f'DELETE FROM "{DEFAULT_PARTITION}" WHERE project_id = %s', [project_name])
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{TABLE}" FOR VALUES IN (%s)', [project_name])
+        if moved:
+            cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{name}_moved"')
+            cursor.execute(f'DROP TABLE "{name}_moved"')
+
+
+def drop_partition(project_name: str, using: str = "default"):
+    """
+    Removes every generated model of a project at once by dropping its partition.
+    """
+    name = partition_name(project_name)
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+
+
+def partition_table(batch_size: int = 10000, using: str = "default", execute: bool = True, log: Callable[[str], None] = logger.info) -> List[str]:
+    """
+    Converts generated_model into a table partitioned by project.
+
+    Runs in a single transaction holding a SHARE lock on generated_model: reads continue while rows are copied,
+    writes wait until the new table is swapped in. The old table is kept as generated_model_unpartitioned.
+
+    :param batch_size: number of rows copied per statement.
+    :param execute: when False, only returns the statements that would be executed.
+    :param log: receives progress messages.
+    :returns: the executed (or planned) statements.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        raise RuntimeError("Partitioning requires PostgreSQL.")
+    if is_partitioned(using):
+        raise RuntimeError(f"{TABLE} is already partitioned.")
+
+    new_table, old_table, sequence = f"{TABLE}_partitioned", f"{TABLE}_unpartitioned", f"{TABLE}_partitioned_id_seq"
+    statements = []
+
+    def run(cursor, sql, params=None):
+        statements.append(sql if params is None else f"{sql} -- {params}")
+        if execute:
+            cursor.execute(sql, params)
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        run(cursor, f'LOCK TABLE "{TABLE}" IN SHARE MODE')
+
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass",
+            [TABLE]
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+            "WHERE x.indrelid = %s::regclass AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)",
+            [TABLE]
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'",
+            [TABLE]
+        )
+        referencing = cursor.fetchall()
+        cursor.execute(f'SELECT project_name FROM "{Project._meta.db_table}"')
+        projects = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{TABLE}"')
+        max_id = cursor.fetchone()[0]
+
+        # the names of constraints and indexes are kept for the new table, so the old ones step aside
+        for name, kind, _ in constraints:
+            if kind in ("p", "u"):
+                run(cursor, f'ALTER TABLE "{TABLE}" RENAME CONSTRAINT "{name}" TO "{name[:50]}_unpart"')
+        for name, _ in indexes:
+            run(cursor, f'ALTER INDEX "{name}" RENAME TO "{name[:50]}_unpart"')
+        for table, name in referencing:
+            log(f"Dropping foreign key {name} of {table}; partitioned tables cannot be referenced by id alone.")
+            run(cursor, f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+
+        run(cursor, f'CREATE TABLE "{new_table}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING STORAGE) PARTITION BY LIST (project_id)')
+        run(cursor, f'CREATE SEQUENCE "{sequence}" START WITH {max_id + 1}')
+        run(cursor, f'ALTER TABLE "{new_table}" ALTER COLUMN id SET DEFAULT nextval(\'"{sequence}"\')')
+        for project_name in projects:
+            run(cursor, f'CREATE TABLE "{partition_name(project_name)}" PARTITION OF "{new_table}" FOR VALUES IN (%s)', [project_name])
+        run(cursor, f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{new_table}" DEFAULT')
+
+        for start in range(0, max_id, batch_size):
+            run(cursor, f'INSERT INTO "{new_table}" SELECT * FROM "{TABLE}" WHERE id > %s AND id <= %s', [start, start + batch_size])
+            log(f"Copied rows up to id {min(start + batch_size, max_id)} of {max_id}.")
+
+        for name, kind, definition in constraints:
+            if kind == "p":
+                run(cursor, f'ALTER TABLE "{new_table}" ADD CONSTRAINT "{name}" PRIMARY KEY (id, project_id)')
+            elif kind == "u" and "project_id" not in definition:
+                log(f"Skipping unique constraint {name}: {definition} does not contain the partition key.")
+            else:
+                run(cursor, f'ALTER TABLE "{new_table}" ADD CONSTRAINT "{name}" {definition}')
+        for name, definition in indexes:
+            run(cursor, re.sub(rf" ON (\S+\.)?{TABLE} ", f' ON "{new_table}" ', definition, count=1))
+
+        run(cursor, f'ALTER TABLE "{TABLE}" RENAME TO "{old_table}"')
+        run(cursor, f'ALTER TABLE "{new_table}" RENAME TO "{TABLE}"')
+        run(cursor, f'ALTER SEQUENCE "{sequence}" OWNED BY "{TABLE}".id')
+
+    if execute:
+        _partitioned[using] = True
+    return statements
@@ -0,0 +1,33 @@
+"""
+Server-side rendering of markdown documents.
+
+Documents are rendered to sanitized HTML when they are saved, so reads never render. Rendered HTML is also cached
+by the hash of its source text, which lets identical texts (e.g. a document saved again unchanged, or copied to
+another slug) skip rendering altogether. A changed text has a different hash, so stale HTML is never served.
+"""
+from django.core.cache import cache
+from hashlib import sha256
+
+import markdown
+import nh3
+
+MARKDOWN_EXTENSIONS = ["extra", "sane_lists"]
+RENDER_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+_html_key = "markdown_html:{digest}"
+
+
+def content_hash(text: str) -> str:
+    return sha256(text.encode()).hexdigest()
+
+
+def render_markdown(text: str) -> str:
+    """
+    Renders markdown text to HTML, stripped of scripts, event handlers and anything else nh3 does not allow.
+    """
+    key = _html_key.format(digest=content_hash(text))
+    html = cache.get(key)
+    if html is None:
+        html = nh3.clean(markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS))
+        cache.set(key, html, timeout=RENDER_CACHE_TIMEOUT)
+    return html
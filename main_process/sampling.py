@@ -0,0 +1,120 @@
+"""
+Random and stratified samples of a project's models.
+
+Every model is given a uniformly random `sample_key` when it is created. A sample of N models is the N models
+following a starting point on the (project, sample_key) index, wrapping around at 1, so drawing it reads N index
+entries whatever the size of the project. The starting point is derived from a seed, which makes a sample
+reproducible for as long as the project does not change.
+
+Stratified samples split the range of one or two numeric fields (taken from the project's schema) into equal-width
+bins and draw an equal share of the sample from every combination of bins. The index is walked from the starting
+point on in batches, with the database computing the stratum of every model read, until every stratum has its share
+or STRATIFIED_SCAN_FACTOR times the sample size has been read. Drawing a sample thus reads O(N) models rather than
+the whole project; the price is that a stratum holding fewer than about 1 in STRATIFIED_SCAN_FACTOR models may not
+get its full share. Shares left over by sparse strata are filled from the whole project.
+"""
+from django.db.models import F, IntegerField, QuerySet, Value
+from django.db.models.functions import Floor, Least
+from morpho_typing import MorphoBaseType
+from rest_framework.exceptions import ValidationError
+from typing import Dict, Iterator, List, Tuple
+
+from main_process.fieldsets import numeric_field_value
+from main_process.models import Project
+
+import random
+
+MAX_SAMPLE_SIZE = 10000
+DEFAULT_BINS = 4
+MAX_BINS = 20
+# a stratified sample reads at most this many models per model drawn before filling the remaining shares
+STRATIFIED_SCAN_FACTOR = 10
+# rows read per query while walking the index, unless the sample is larger
+STRATIFIED_SCAN_BATCH = 1000
+
+
+def _from_start(queryset: QuerySet, start: float, size: int) -> list:
+    # the models following the start on the sample_key index, wrapping around
+    models = list(queryset.filter(sample_key__gte=start).order_by("sample_key")[:size])
+    if len(models) < size:
+        models += list(queryset.filter(sample_key__lt=start).order_by("sample_key")[:size - len(models)])
+    return models
+
+
+def _walk(queryset: QuerySet, start: float, batch: int) -> Iterator[list]:
+    # batches of (pk, stratum) of the models following the start on the sample_key index, wrapping around once
+    for segment in (queryset.filter(sample_key__gte=start), queryset.filter(sample_key__lt=start)):
+        segment, last = segment.order_by("sample_key", "pk").values_list("sample_key", "pk", "stratum"), None
+        while True:
+            rows = list((segment if last is None else segment.filter(sample_key__gte=last[0]).exclude(sample_key=last[0], pk__lte=last[1]))[:batch])
+            if len(rows) == 0:
+                break
+            last = rows[-1][:2]
+            yield [(pk, stratum) for _, pk, stratum in rows]
+
+
+def _stratum_field(project: Project, name: str) -> Tuple[str, str, Dict]:
+    for column, metadata in (("parameters", "variable_metadata"), ("output_parameters", "output_metadata")):
+        for field in getattr(project, metadata):
+            if field["field_name"] == name:
+                if MorphoBaseType(field["field_type"]) == MorphoBaseType.STRING:
+                    raise ValidationError(f"Cannot stratify over '{name}': only numeric fields can be stratified.")
+                return column, metadata, field
+    raise ValidationError(f"Unknown field '{name}'.")
+
+
+def sample_models(queryset: QuerySet, project: Project, size: int, seed: int | None = None,
+                  strata: List[str] | None = None, bins: int = DEFAULT_BINS) -> list:
+    """
+    Draws a sample of models from a queryset of a project's models.
+
+    :param size: number of models to draw, at most MAX_SAMPLE_SIZE.
+    :param seed: makes the sample reproducible; a random sample is drawn without one.
+    :param strata: one or two numeric fields to stratify the sample over.
+    :param bins: number of equal-width bins per stratified field.
+    """
+    if not 0 < size <= MAX_SAMPLE_SIZE:
+        raise ValidationError(f"sample must be between 1 and {MAX_SAMPLE_SIZE}.")
+    start = random.Random(seed).random()
+
+    if not strata:
+        return _from_start(queryset, start, size)
+    if len(strata) > 2:
+        raise ValidationError("A sample can be stratified over at most two fields.")
+    if not 0 < bins <= MAX_BINS:
+        raise ValidationError(f"bins must be between 1 and {MAX_BINS}.")
+
+    # the stratum of a model is the combination of the bins its values fall in; models with a value outside the
+    # field's range, or without a numeric value, belong to none
+    stratified, stratum = queryset, Value(0, output_field=IntegerField())
+    for index, name in enumerate(strata):
+        column, metadata, field = _stratum_field(project, name)
+        low, high = (float(bound) for bound in field["field_range"])
+        value = f"stratum_value_{index}"
+        stratified = stratified.annotate(**{value: numeric_field_value(project, metadata, column, name)}).filter(
+            **{f"{value}__gte": low, f"{value}__lte": high}
+        )
+        # the upper bound belongs to the last bin
+        bin_index = Least(Floor((F(value) - low) * bins / (high - low)), Value(bins - 1), output_field=IntegerField())
+        stratum = stratum * bins + bin_index
+
+    cells = bins ** len(strata)
+    # an equal share per stratum, with the remainder of the division spread over the first strata
+    shares = [size // cells + (1 if cell < size % cells else 0) for cell in range(cells)]
+    drawn: Dict[int, List[int]] = {cell: [] for cell in range(cells)}
+    missing, scanned = size, 0
+    for rows in _walk(stratified.annotate(stratum=stratum), start, max(size, STRATIFIED_SCAN_BATCH)):
+        for pk, cell in rows:
+            if len(drawn[cell]) < shares[cell]:
+                drawn[cell].append(pk)
+                missing -= 1
+        scanned += len(rows)
+        if missing == 0 or scanned >= STRATIFIED_SCAN_FACTOR * size:
+            break
+
+    pks = [pk for cell in range(cells) for pk in drawn[cell]]
+    loaded = queryset.in_bulk(pks)
+    models = [loaded[pk] for pk in pks]
+    if len(models) < size:
+        models += _from_start(queryset.exclude(pk__in=pks), start, size - len(models))
+    return models
@@ -0,0 +1,83 @@
+"""
+Ranked search over projects and markdown documents.
+
+Every project and document owns a SearchEntry, rewritten whenever the project, its metadata or a document is
+saved. On PostgreSQL the entry's weighted tsvector is computed on write and matched through a GIN index, and
+titles are also matched by trigram similarity so that partial and misspelled names are found. Other databases
+fall back to a case-insensitive substring match.
+"""
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from typing import Dict, List
+
+from main_process.models import MarkdownDocument, Project, ProjectMetadata, SearchEntry
+
+SEARCH_CONFIG = "english"
+
+
+def _store(kind: str, key: str, title: str, body: str):
+    SearchEntry.objects.update_or_create(kind=kind, key=key, defaults={"title": title, "body": body})
+    if connection.vendor == "postgresql":
+        SearchEntry.objects.filter(kind=kind, key=key).update(
+            search_vector=SearchVector("title", weight="A", config=SEARCH_CONFIG) + SearchVector("body", weight="B", config=SEARCH_CONFIG)
+        )
+
+
+def index_project(project_name: str):
+    """
+    Rewrites the search entry of a project; deleted projects lose theirs.
+    """
+    project = Project.objects.filter(project_name=project_name, deleted=False).first()
+    if project is None:
+        SearchEntry.objects.filter(kind=SearchEntry.Kind.PROJECT, key=project_name).delete()
+        return
+    metadata = ProjectMetadata.objects.filter(project=project).first()
+    title, body = project.project_name, []
+    if metadata is not None:
+        title = f"{metadata.human_name} ({project.project_name})" if metadata.human_name not in ("", project.project_name) else title
+        if isinstance(metadata.captions, list):
+            body += [caption.get("display_name", "") for caption in metadata.captions if isinstance(caption, dict)]
+        # the description is not guaranteed to exist: its foreign key does nothing when the document is deleted
+        description = MarkdownDocument.objects.filter(pk=metadata.description_id).values_list("text", flat=True).first()
+        if description is not None:
+            body.append(description)
+    _store(SearchEntry.Kind.PROJECT, project.project_name, title, "\n".join(body))
+
+
+def index_document(document: MarkdownDocument):
+    """
+    Rewrites the search entry of a document, and of the projects it describes.
+    """
+    _store(SearchEntry.Kind.DOCUMENT, document.slug, document.slug, document.text)
+    for project_name in ProjectMetadata.objects.filter(description=document).values_list("project_id", flat=True):
+        index_project(project_name)
+
+
+def rebuild_index():
+    for project_name in Project.objects.values_list("project_name", flat=True):
+        index_project(project_name)
+    for document in MarkdownDocument.objects.all().iterator():
+        _store(SearchEntry.Kind.DOCUMENT, document.slug, document.slug, document.text)
+
+
+def search(text: str, limit: int = 20) -> List[Dict]:
+    """
+    Returns the entries matching a search text, best match first.
+    """
+    entries = SearchEntry.objects.all()
+    if connection.vendor == "postgresql":
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        entries = entries.annotate(
+            rank=SearchRank(F("search_vector"), query) + TrigramSimilarity("title", text),
+            headline=SearchHeadline("body", query, config=SEARCH_CONFIG, max_words=20, min_words=5),
+        ).filter(Q(search_vector=query) | Q(title__trigram_similar=text)).order_by("-rank", "title")
+    else:
+        entries = entries.annotate(rank=Value(0.0, output_field=FloatField()), headline=F("body")).filter(
+            Q(title__icontains=text) | Q(body__icontains=text)
+        ).order_by("title")
+
+    return [
+        {"kind": entry.kind, "key": entry.key, "title": entry.title, "headline": entry.headline[:300], "rank": entry.rank}
+        for entry in entries.only("kind", "key", "title")[:limit]
+    ]
@@ -1,10 +1,66 @@
+from django.db.models import Max
 from morpho_typing import MorphoAssetCollection, MorphoProjectSchema, MorphoProjectField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+import pydantic
 import serpy
 from typing import Dict
 
-from main_process.models import AssetFile, GeneratedModel, Project, ProjectMetadata, MarkdownDocument
+from main_process.backfill import field_default
+from main_process.compact import compact_values, expand_values, field_names
+from main_process.fieldsets import SELECTED_VALUES, FieldSelection, prune, unwrap
+from main_process.models import AssetFile, GeneratedModel, Project, ProjectMetadata, MarkdownDocument, SchemaBackfill, parameter_fingerprint
+
+
+def schema_record(schema: MorphoProjectSchema, values: Dict) -> list:
+    """
+    Arranges a set of field values according to the schema's field order.
+
+    Raises ValidationError if a field of the schema is missing from the values.
+    """
+    if not isinstance(values, dict):
+        raise ValidationError("Field values must be an object of the form {field_name: value}.")
+    missing_fields = [field.field_name for field in schema.fields if field.field_name not in values]
+    if len(missing_fields) > 0:
+        raise ValidationError(f"The following fields are missing: {missing_fields}")
+    return [values[field.field_name] for field in schema.fields]
+
+
+def cast_record(schema: MorphoProjectSchema, record: list) -> list:
+    """
+    Casts every value of a schema-ordered record to its field's native type, so that values the schema accepts
+    in another form (e.g. "0.1" for a DOUBLE) are stored and fingerprinted like their native counterparts.
+
+    Raises ValidationError if a value cannot be cast.
+    """
+    cast = []
+    for field, value in zip(schema.fields, record):
+        try:
+            cast.append(field.field_type.native_type(value) if value is not None else None)
+        except (TypeError, ValueError):
+            raise ValidationError(f"'{value}' is not a valid value for field '{field.field_name}'.")
+    return cast
+
+
+def record_validator(schema: MorphoProjectSchema):
+    """
+    Returns a function that validates a record like MorphoProjectSchema.validate_record does.
+
+    MorphoProjectSchema rebuilds its per-field validating models on every call; the returned function builds them
+    once, so a whole batch of records can be validated against the same schema cheaply.
+    """
+    parameter_models = schema.parameter_models
+
+    def validate_record(record: list) -> tuple[bool, list]:
+        errors = []
+        for item, parameter_model in zip(record, parameter_models):
+            try:
+                parameter_model.model_validate({"value": item})
+            except pydantic.ValidationError as e:
+                errors.append((e.errors()[0]['msg'], parameter_model.__name__))
+        return (len(errors) == 0, errors)
+
+    return validate_record
 
 
 class AssetFileSerializer(serializers.ModelSerializer):
@@ -13,6 +69,15 @@ class AssetFileSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+def storage_prefix(storage) -> str:
+    """
+    Returns the URL prefix of the files of a storage backend, so that a file's URL is the prefix followed by its name.
+    """
+    if hasattr(storage, "get_prefix"):
+        return storage.get_prefix()
+    return storage.url("")
+
+
 class AssetFileReadOnlySerializer(serpy.Serializer):
     id = serpy.StrField()
     file = serpy.MethodField()
@@ -20,10 +85,10 @@ class AssetFileReadOnlySerializer(serpy.Serializer):
     generated_model = serpy.MethodField()
 
     def get_file(self, instance):
-        return instance.file.storage.get_prefix() + instance.file.name
+        return storage_prefix(instance.file.storage) + instance.file.name
 
     def get_generated_model(self, instance):
-        return instance.generated_model.id
+        return instance.generated_model_id
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -33,6 +98,19 @@ class ProjectSerializer(serializers.ModelSerializer):
 
     metadata = serializers.SerializerMethodField(read_only=True)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # `?fields=` prunes read responses; skipping `metadata` also skips its query per project
+        request = self.context.get("request")
+        if request is not None and request.method == "GET" and "fields" in request.query_params:
+            selected = [name.strip() for name in request.query_params["fields"].split(",") if name.strip() != ""]
+            unknown = [name for name in selected if name not in self.fields]
+            if len(unknown) > 0:
+                raise ValidationError(f"Unknown fields: {unknown}")
+            for name in list(self.fields.keys()):
+                if name not in selected:
+                    self.fields.pop(name)
+
     def get_metadata(self, instance):
         return ProjectMetadataSerializer(ProjectMetadata.objects.get(project=instance)).data
 
@@ -51,6 +129,8 @@ class ProjectSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         # allow addition of assets
         # + modification of certain fields within metadata
+        schema_layout = (field_names(instance.variable_metadata), field_names(instance.output_metadata))
+        added_defaults = {"parameters": {}, "output_parameters": {}}
 
         if "variable_metadata" in validated_data:
             # compare new metadata fields to old metadata fields. these must be in two different dictionaries.
@@ -71,7 +151,12 @@ class ProjectSerializer(serializers.ModelSerializer):
                     old_fields[field_name].field_range = new_fields[field_name].field_range
 
             variable_metadata = [old_fields[field_name].model_dump() for field_name in old_fields.keys()]
-            
+            # fields not in the old schema are appended in the given order; existing models get them by backfill
+            for field in validated_data["variable_metadata"]:
+                if field["field_name"] not in old_fields:
+                    variable_metadata.append(new_fields[field["field_name"]].model_dump())
+                    added_defaults["parameters"][field["field_name"]] = field_default(field, "parameters")
+
             setattr(instance, "variable_metadata", variable_metadata)
 
         if "output_metadata" in validated_data:
@@ -90,7 +175,12 @@ class ProjectSerializer(serializers.ModelSerializer):
                     old_fields[field_name].field_range = new_fields[field_name].field_range
 
             output_metadata = [old_fields[field_name].model_dump() for field_name in old_fields.keys()]
-            
+            # fields not in the old schema are appended in the given order; existing models get them by backfill
+            for field in validated_data["output_metadata"]:
+                if field["field_name"] not in old_fields:
+                    output_metadata.append(new_fields[field["field_name"]].model_dump())
+                    added_defaults["output_parameters"][field["field_name"]] = field_default(field, "output_parameters")
+
             setattr(instance, "output_metadata", output_metadata)
 
         if "assets" in validated_data:
@@ -111,20 +201,66 @@ class ProjectSerializer(serializers.ModelSerializer):
 
             setattr(instance, "assets", validated_data["assets"])
 
+        if schema_layout != (field_names(instance.variable_metadata), field_names(instance.output_metadata)):
+            # compactly stored values are positional, so every change to the field layout gets a new version
+            instance.schema_version += 1
+
         instance.save()
 
+        if any(len(defaults) > 0 for defaults in added_defaults.values()):
+            max_id = GeneratedModel.objects.filter(project=instance).aggregate(max_id=Max("id"))["max_id"]
+            if max_id is not None:
+                SchemaBackfill.objects.create(project=instance, schema_version=instance.schema_version, defaults=added_defaults, max_id=max_id)
+
         return instance
 
 
 class GeneratedModelReadOnlySerializer(serpy.Serializer):
     id = serpy.IntField()
     scoped_id = serpy.IntField()
-    parameters = serpy.Field(attr="parameters")
-    output_parameters = serpy.Field(attr="output_parameters")
+    parameters = serpy.MethodField()
+    output_parameters = serpy.MethodField()
     files = serpy.MethodField()
 
+    def __init__(self, *args, context=None, **kwargs):
+        # serpy drops the context; the project in it expands compactly stored values without a lookup per model
+        self.context = context or {}
+        self._field_names = {}
+        # a FieldSelection in the context prunes the response, see main_process.fieldsets
+        self.selection: FieldSelection = self.context.get("selection") or FieldSelection()
+        super().__init__(*args, **kwargs)
+        if self.selection.fields is not None:
+            self._compiled_fields = [field for field in self._compiled_fields if field[0] in self.selection.fields]
+
+    def expand(self, instance, metadata: str, values):
+        if not isinstance(values, list):
+            return values
+        key = (instance.project_id, metadata)
+        if key not in self._field_names:
+            project = self.context.get("project")
+            if project is None or project.project_name != instance.project_id:
+                project = instance.project
+            self._field_names[key] = field_names(getattr(project, metadata))
+        return expand_values(self._field_names[key], values)
+
+    def values(self, instance, column: str, metadata: str):
+        names = self.selection.names(column)
+        if names is not None and hasattr(instance, SELECTED_VALUES[column]):
+            # extracted by the database
+            return unwrap(getattr(instance, SELECTED_VALUES[column]))
+        return prune(self.expand(instance, metadata, getattr(instance, column)), names)
+
+    def get_parameters(self, instance):
+        return self.values(instance, "parameters", "variable_metadata")
+
+    def get_output_parameters(self, instance):
+        return self.values(instance, "output_parameters", "output_metadata")
+
     def get_files(self, instance):
-        return [AssetFileReadOnlySerializer(file).data for file in instance.files.all()]
+        files = instance.files.all()
+        if self.selection.assets is not None:
+            files = [file for file in files if file.tag in self.selection.assets]
+        return [AssetFileReadOnlySerializer(file).data for file in files]
 
 
 class GeneratedModelSerializer(serializers.ModelSerializer):
@@ -147,33 +283,47 @@ class GeneratedModelSerializer(serializers.ModelSerializer):
                 fields=project_instance.variable_metadata)
 
             # arrange the record parameters according to the schema's order
-            record, params = [], {}
-            for field in schema.fields:
-                record.append(attrs["parameters"][field.field_name])
-                params[field.field_name] = attrs["parameters"][field.field_name]
+            record = schema_record(schema, attrs["parameters"])
             is_valid, errors = schema.validate_record(record)
             if not is_valid:
                 raise ValidationError(errors)
+            record = cast_record(schema, record)
+            params = {field.field_name: value for field, value in zip(schema.fields, record)}
             new_attrs["parameters"] = params
+            new_attrs["parameter_hash"] = parameter_fingerprint(record)
+            new_attrs["schema_version"] = project_instance.schema_version
 
         if "output_parameters" in attrs:
             schema = MorphoProjectSchema(
                 fields=project_instance.output_metadata)
             # arrange the record parameters according to the schema's order
-            record, params = [], {}
-            for field in schema.fields:
-                record.append(attrs["output_parameters"][field.field_name])
-                params[field.field_name] = attrs["output_parameters"][field.field_name]
+            record = schema_record(schema, attrs["output_parameters"])
             is_valid, errors = schema.validate_record(record)
             if not is_valid:
                 raise ValidationError(errors)
+            record = cast_record(schema, record)
+            params = {field.field_name: value for field, value in zip(schema.fields, record)}
             new_attrs["output_parameters"] = params
+            new_attrs["schema_version"] = project_instance.schema_version
 
         if "scoped_id" in attrs:
             new_attrs["scoped_id"] = attrs["scoped_id"]
 
+        if project_instance.compact_storage:
+            if "parameters" in new_attrs:
+                new_attrs["parameters"] = compact_values(project_instance.variable_metadata, new_attrs["parameters"])
+            if "output_parameters" in new_attrs:
+                new_attrs["output_parameters"] = compact_values(project_instance.output_metadata, new_attrs["output_parameters"])
+
         return super().validate(new_attrs)
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        project_instance = self.context["project"]
+        data["parameters"] = expand_values(field_names(project_instance.variable_metadata), data["parameters"])
+        data["output_parameters"] = expand_values(field_names(project_instance.output_metadata), data["output_parameters"])
+        return data
+
     def create(self, validated_data):
         project_instance = self.context["project"]
 
@@ -205,7 +355,20 @@ class ProjectMetadataSerializer(serializers.ModelSerializer):
         return attrs
 
 
+def wants_html(request) -> bool:
+    """
+    Returns whether a request asks for pre-rendered HTML of its markdown documents through `?render=html`.
+    """
+    return request is not None and request.query_params.get("render") == "html"
+
+
 class MarkdownDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = MarkdownDocument
-        fields = ["text"]
+        fields = ["text", "html"]
+        read_only_fields = ["html"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not wants_html(self.context.get("request")):
+            self.fields.pop("html")
@@ -1,8 +1,9 @@
 from django.urls import include, path
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
 from rest_framework_nested import routers
 
 from main_process import views
+from main_process.openapi import CachedSpectacularAPIView
 
 router = routers.SimpleRouter()
 router.register(r'project', views.ProjectViewSet)
@@ -20,6 +21,8 @@ generated_model_router.register(
 
 metadata_urlpatterns = [
     path('project/<str:pk>/metadata/', views.ProjectMetadataView.as_view()),
+    path('project/<str:pk>/stream/', views.project_stream),
+    path('search/', views.SearchView.as_view()),
 ]
 
 # Wire up our API using automatic URL routing.
@@ -32,7 +35,7 @@ urlpatterns = [
 ]
 
 urlpatterns += [
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('schema/', CachedSpectacularAPIView.as_view(), name='schema'),
     # Optional UI:
     path('schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
@@ -1,29 +1,154 @@
+from asgiref.sync import sync_to_async
 from authorization.utils import JWTAuthentication
 from django.contrib.auth.models import User
-from django.db import transaction
-from django.db.models import Max 
-from morpho_typing import MorphoAssetCollection
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from morpho_typing import MorphoAssetCollection, MorphoBaseType, MorphoProjectSchema
 import pydantic
 from rest_framework import permissions, status, views, viewsets, views
+from rest_framework.decorators import action
 from rest_framework.authentication import (SessionAuthentication)
-from rest_framework.exceptions import ValidationError, APIException
+from rest_framework.exceptions import ValidationError, APIException, NotFound
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from main_process.models import AssetFile, GeneratedModel, Project, ProjectMetadata, MarkdownDocument, Caption
+from main_process.adjacency import grid_neighbours
+from main_process.cache import cached_for_project, invalidate_project, project_cache_stats
+from main_process.compact import compact_values
+from main_process.events import hub
+from main_process.sampling import DEFAULT_BINS, sample_models
+from main_process.search import search
+from main_process.downloads import archive_path, astream_zip, stream_zip
+from main_process.ingestion import ingest_archive
+from main_process.fieldsets import FieldSelection, numeric_field_value, scoped_id_filter, scoped_id_ranges, select_fields
+from main_process.models import AssetFile, GeneratedModel, Project, ProjectChange, ProjectMetadata, MarkdownDocument, Caption, parameter_fingerprint
 from main_process.serializers import (AssetFileSerializer,
                                       GeneratedModelSerializer,
-                                      ProjectSerializer, GeneratedModelReadOnlySerializer, MarkdownDocumentSerializer)
+                                      ProjectSerializer, GeneratedModelReadOnlySerializer, MarkdownDocumentSerializer,
+                                      cast_record, record_validator, schema_record, storage_prefix, wants_html)
 from typing import Literal, Union, List
 
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def project_changes(project: Project, since: int, limit: int) -> dict:
+    """
+    Returns at most `limit` changes of a project after the sequence number `since`, along with the current state
+    of the models they touch, keyed by scoped_id.
+    """
+    changes = list(
+        ProjectChange.objects.filter(project=project, sequence__gt=since).order_by("sequence")
+        .values("sequence", "kind", "scoped_id", "tag")[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    models = GeneratedModel.objects.filter(
+        project=project, scoped_id__in=set(change["scoped_id"] for change in changes)
+    ).prefetch_related("files")
+    serialized_models = GeneratedModelReadOnlySerializer(models, many=True, context={"project": project}).data
+
+    return {
+        "changes": changes,
+        "models": {model["scoped_id"]: model for model in serialized_models},
+        "last_sequence": changes[-1]["sequence"] if len(changes) > 0 else since,
+        "has_more": has_more,
+    }
+
+
+def asset_manifest(project: Project, tags: List[str] | None = None) -> dict:
+    """
+    Returns the URLs of a project's asset files in the form {scoped_id: {tag: url}}, optionally only for some tags.
+    """
+    files = AssetFile.objects.filter(generated_model__project=project)
+    if tags is not None:
+        files = files.filter(tag__in=tags)
+    prefix = storage_prefix(AssetFile._meta.get_field("file").storage)
+
+    manifest = {}
+    for scoped_id, tag, name in files.order_by("generated_model__scoped_id", "tag").values_list("generated_model__scoped_id", "tag", "file"):
+        manifest.setdefault(scoped_id, {})[tag] = prefix + name
+    return manifest
+
+
+def project_bootstrap(project: Project, render_html: bool = False) -> dict:
+    """
+    Returns everything the explorer needs to open a project: its schema and assets, its metadata, and a summary
+    of its models (count, evaluated count, value ranges and file counts per asset tag).
+
+    Built with three queries, whatever the size of the project.
+    """
+    metadata = ProjectMetadata.objects.select_related("description").filter(project=project).first()
+
+    # value ranges of every numeric field, along with the counts, in a single aggregate
+    aggregates = {"model_count": Count("id"), "evaluated_count": Count("output_parameters"), "last_scoped_id": Max("scoped_id")}
+    ranges = []
+    for column, metadata_name in (("parameters", "variable_metadata"), ("output_parameters", "output_metadata")):
+        for field in getattr(project, metadata_name):
+            if MorphoBaseType(field["field_type"]) == MorphoBaseType.STRING:
+                continue
+            value = numeric_field_value(project, metadata_name, column, field["field_name"])
+            ranges.append((column, field["field_name"], len(ranges)))
+            aggregates[f"min_{len(ranges) - 1}"] = Min(value)
+            aggregates[f"max_{len(ranges) - 1}"] = Max(value)
+    summary = GeneratedModel.objects.filter(project=project).aggregate(**aggregates)
+
+    stats = {"parameters": {}, "output_parameters": {}}
+    for column, name, index in ranges:
+        stats[column][name] = {"min": summary[f"min_{index}"], "max": summary[f"max_{index}"]}
+
+    asset_counts = dict(
+        AssetFile.objects.filter(generated_model__project=project).values("tag").annotate(count=Count("id")).values_list("tag", "count")
+    )
+
+    description = None
+    if metadata is not None:
+        description = {"slug": metadata.description.slug, "text": metadata.description.text}
+        if render_html:
+            description["html"] = metadata.description.html
+
+    return {
+        "project_name": project.project_name,
+        "creation_date": project.creation_date,
+        "schema_version": project.schema_version,
+        "variable_metadata": project.variable_metadata,
+        "output_metadata": project.output_metadata,
+        "assets": project.assets,
+        "human_name": metadata.human_name if metadata is not None else project.project_name,
+        "captions": metadata.captions if metadata is not None else [],
+        "description": description,
+        "model_count": summary["model_count"],
+        "evaluated_count": summary["evaluated_count"],
+        "last_scoped_id": summary["last_scoped_id"],
+        "stats": stats,
+        "asset_counts": asset_counts,
+    }
 
 
 class AssetFileViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AssetFile.objects.all()
     serializer_class = AssetFileSerializer
+    read_from_replica = True  # see backend.db_router
 
     def get_queryset(self):
-        return AssetFile.objects.filter(generated_model=self.kwargs["model_pk"])
+        # the listing is cached under the project of the URL, so models of other projects must not be found through it
+        return AssetFile.objects.filter(generated_model=self.kwargs["model_pk"], generated_model__project=self.kwargs["project_pk"])
+
+    def list(self, request, *args, **kwargs):
+        data = cached_for_project(
+            self.kwargs["project_pk"], "files", {"model": self.kwargs["model_pk"], **request.query_params.dict()},
+            lambda: super(AssetFileViewSet, self).list(request, *args, **kwargs).data
+        )
+        return Response(data)
+
+
+LISTING_CHUNK_SIZE = 2000
+MAX_BATCH_SIZE = 1000
 
 
 class GeneratedModelViewSet(viewsets.ModelViewSet):
@@ -31,12 +156,13 @@ class GeneratedModelViewSet(viewsets.ModelViewSet):
     serializer_class = GeneratedModelSerializer
     authentication_classes = [JWTAuthentication, SessionAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    read_from_replica = True
 
     def get_serializer(self, *args, **kwargs):
         if self.request.method in ('PUT', 'PATCH') and isinstance(self.request.data, list):
             kwargs['many'] = True
         elif self.request.method == 'GET':
-            return GeneratedModelReadOnlySerializer(*args, **kwargs)
+            return GeneratedModelReadOnlySerializer(*args, context=self.get_serializer_context(), **kwargs)
         return super().get_serializer(*args, **kwargs)
 
     def get_serializer_context(self):
@@ -44,10 +170,66 @@ class GeneratedModelViewSet(viewsets.ModelViewSet):
         project = Project.objects.get(project_name=self.kwargs["project_pk"])
         context.update(
             {"project": project})
+        if self.request is not None and self.request.method == "GET":
+            context["selection"] = self.get_selection(project)
         return context
 
+    def get_selection(self, project: Project) -> FieldSelection:
+        if not hasattr(self, "_selection"):
+            self._selection = FieldSelection.from_query(self.request.query_params, project)
+        return self._selection
+
     def get_queryset(self):
-        return GeneratedModel.objects.filter(project=self.kwargs["project_pk"]).prefetch_related("files").order_by("scoped_id")
+        queryset = GeneratedModel.objects.filter(project=self.kwargs["project_pk"]).prefetch_related("files").order_by("scoped_id")
+        if self.request is not None and self.request.method == "GET" and self.action in ("list", "retrieve", "batch"):
+            project = Project.objects.get(project_name=self.kwargs["project_pk"])
+            selection = self.get_selection(project)
+            if not selection.is_empty:
+                queryset = select_fields(queryset, project, selection)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if "sample" in request.query_params:
+            return self.sample(request)
+        # models are streamed from a server-side cursor in chunks (files are prefetched per chunk), so a large
+        # project is never held in memory as model instances all at once
+        data = cached_for_project(
+            self.kwargs["project_pk"], "models", request.query_params.dict(),
+            lambda: self.get_serializer(self.filter_queryset(self.get_queryset()).iterator(chunk_size=LISTING_CHUNK_SIZE), many=True).data
+        )
+        return Response(data)
+
+    def sample(self, request):
+        """
+        Lists a sample of `?sample=N` models instead of every model; see main_process.sampling.
+
+        `?seed=` makes the sample reproducible, `?strata=` stratifies it over one or two comma-separated numeric
+        fields, split into `?bins=` equal-width bins each (4 by default).
+        """
+        try:
+            size = int(request.query_params["sample"])
+            seed = int(request.query_params["seed"]) if "seed" in request.query_params else None
+            bins = int(request.query_params.get("bins", DEFAULT_BINS))
+        except ValueError:
+            raise ValidationError("sample, seed and bins must be integers.")
+        strata = [name.strip() for name in request.query_params.get("strata", "").split(",") if name.strip() != ""]
+        project = self.get_serializer_context()["project"]
+
+        def build():
+            models = sample_models(self.get_queryset(), project, size, seed=seed, strata=strata, bins=bins)
+            return self.get_serializer(models, many=True).data
+
+        if seed is None:
+            # an unseeded sample is meant to differ from one request to the next
+            return Response(build())
+        return Response(cached_for_project(self.kwargs["project_pk"], "models", request.query_params.dict(), build))
+
+    def retrieve(self, request, *args, **kwargs):
+        data = cached_for_project(
+            self.kwargs["project_pk"], "model", {"pk": self.kwargs["pk"], **request.query_params.dict()},
+            lambda: super(GeneratedModelViewSet, self).retrieve(request, *args, **kwargs).data
+        )
+        return Response(data)
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -55,6 +237,19 @@ class GeneratedModelViewSet(viewsets.ModelViewSet):
         erroring_models = []
         succeeding_models = []
         if isinstance(models, dict):
+            if "parameters" in models:
+                # re-submitted designs are caught with a single probe of the parameter fingerprint index
+                existing = self.find_by_parameters(self.get_serializer_context()["project"], models["parameters"])
+                if existing is not None:
+                    if request.query_params.get("upsert", "").lower() not in ("1", "true"):
+                        raise ValidationError(f"A model with these parameters already exists (scoped_id {existing.scoped_id}).")
+                    # upsert: the design was evaluated before, so only its outputs are replaced
+                    serializer = self.get_serializer(
+                        existing, data={key: models[key] for key in ("output_parameters",) if key in models}, partial=True)
+                    serializer.is_valid(raise_exception=True)
+                    self.perform_update(serializer)
+                    return Response(serializer.data, status=status.HTTP_200_OK)
+
             # perform regular, single-object creation
             scoped_id = 0 # this WILL break. Please fetch the latest scoped_id and THEN add the models.
             scoped_id_set = GeneratedModel.objects.select_for_update().filter(project_id=self.get_serializer_context()["project"].project_name)
@@ -63,7 +258,15 @@ class GeneratedModelViewSet(viewsets.ModelViewSet):
                 models["scoped_id"] = scoped_id
             serializer = self.get_serializer(data=models)
             serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
+            try:
+                with transaction.atomic():
+                    self.perform_create(serializer)
+            except IntegrityError:
+                # a concurrent request inserted the same parameters after the probe above
+                existing = self.find_by_parameters(self.get_serializer_context()["project"], models.get("parameters", {}))
+                if existing is None:
+                    raise
+                raise ValidationError(f"A model with these parameters already exists (scoped_id {existing.scoped_id}).")
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
@@ -81,6 +284,142 @@ class GeneratedModelViewSet(viewsets.ModelViewSet):
             headers = self.get_success_headers(serializer.data)
         return Response({"models_created": len(succeeding_models), "failures": erroring_models, "successes": succeeding_models}, status=status.HTTP_200_OK, headers=headers)
 
+    def find_by_parameters(self, project: Project, parameters) -> GeneratedModel | None:
+        """
+        Finds the model of a project with exactly the given parameters through the parameter fingerprint index.
+        """
+        schema = MorphoProjectSchema(fields=project.variable_metadata)
+        record = cast_record(schema, schema_record(schema, parameters))
+        try:
+            return GeneratedModel.objects.get(project=project, parameter_hash=parameter_fingerprint(record))
+        except GeneratedModel.DoesNotExist:
+            return None
+
+    @action(detail=False, methods=["get"])
+    def lookup(self, request, *args, **kwargs):
+        """
+        Returns the model whose parameters exactly match the query parameters, e.g. `lookup/?width=2&height=3.5`.
+        """
+        project = self.get_serializer_context()["project"]
+        parameters = {}
+        for field in MorphoProjectSchema(fields=project.variable_metadata).fields:
+            if field.field_name in request.query_params:
+                value = request.query_params[field.field_name]
+                try:
+                    parameters[field.field_name] = field.field_type.native_type(value)
+                except ValueError:
+                    raise ValidationError(f"'{value}' is not a valid value for parameter '{field.field_name}'.")
+
+        instance = self.find_by_parameters(project, parameters)
+        if instance is None:
+            raise NotFound("No model with these parameters exists.")
+        return Response(self.get_serializer(instance).data)
+
+    @action(detail=False, methods=["get"])
+    def batch(self, request, *args, **kwargs):
+        """
+        Returns the models with the scoped_ids given by `?ids=`, a comma-separated list of scoped_ids and ranges of
+        scoped_ids (e.g. `12,3,40-45`), in the order they are listed. Takes the same field selection as the list.
+
+        Scoped_ids without a model are returned under `missing`.
+        """
+        if "ids" not in request.query_params:
+            raise ValidationError("ids is required.")
+        ranges = scoped_id_ranges(request.query_params["ids"])
+        if sum(last - first + 1 for first, last in ranges) > MAX_BATCH_SIZE:
+            raise ValidationError(f"At most {MAX_BATCH_SIZE} models can be fetched at once.")
+
+        def build():
+            models = {model["scoped_id"]: model for model in self.get_serializer(self.get_queryset().filter(scoped_id_filter(ranges)), many=True).data}
+            scoped_ids = list(dict.fromkeys(scoped_id for first, last in ranges for scoped_id in range(first, last + 1)))
+            return {
+                "models": [models[scoped_id] for scoped_id in scoped_ids if scoped_id in models],
+                "missing": [scoped_id for scoped_id in scoped_ids if scoped_id not in models],
+            }
+
+        return Response(cached_for_project(self.kwargs["project_pk"], "batch", request.query_params.dict(), build))
+
+    @action(detail=True, methods=["get"])
+    def neighbours(self, request, *args, **kwargs):
+        """
+        Returns the models one `field_step` away from this model along each numeric variable field, with every other
+        parameter equal, in the form {field_name: {"previous": model or null, "next": model or null}}.
+        """
+        def build():
+            project = self.get_serializer_context()["project"]
+            neighbours = grid_neighbours(self.get_queryset(), project, self.get_object())
+            models = [model for adjacent in neighbours.values() for model in adjacent.values() if model is not None]
+            serialized = {model.pk: data for model, data in zip(models, self.get_serializer(models, many=True).data)}
+            return {
+                name: {direction: serialized[model.pk] if model is not None else None for direction, model in adjacent.items()}
+                for name, adjacent in neighbours.items()
+            }
+
+        return Response(cached_for_project(
+            self.kwargs["project_pk"], "neighbours", {"pk": self.kwargs["pk"], **request.query_params.dict()}, build
+        ))
+
+    @action(detail=False, methods=["patch"])
+    @transaction.atomic
+    def results(self, request, *args, **kwargs):
+        """
+        Applies the outputs of a batch of models at once.
+
+        Accepts a list of the form [{"scoped_id": int, "output_parameters": {...}}, ...]. The whole batch is validated
+        against the project's output schema and the valid rows are written with a single bulk update; invalid rows
+        are skipped and reported by their index in the list.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError("Body must be a list of the form [{'scoped_id': int, 'output_parameters': {...}}].")
+
+        project = self.get_serializer_context()["project"]
+        schema = MorphoProjectSchema(fields=project.output_metadata)
+        validate_record = record_validator(schema)
+
+        outputs, errors = {}, []
+        for index, row in enumerate(request.data):
+            if not isinstance(row, dict) or not isinstance(row.get("scoped_id"), int) or "output_parameters" not in row:
+                errors.append({"index": index, "errors": ["Row must be of the form {'scoped_id': int, 'output_parameters': {...}}."]})
+                continue
+            scoped_id = row["scoped_id"]
+            if scoped_id in outputs:
+                errors.append({"index": index, "scoped_id": scoped_id, "errors": ["scoped_id appears more than once in the batch."]})
+                continue
+            try:
+                record = schema_record(schema, row["output_parameters"])
+            except ValidationError as ve:
+                errors.append({"index": index, "scoped_id": scoped_id, "errors": ve.detail})
+                continue
+            is_valid, record_errors = validate_record(record)
+            if not is_valid:
+                errors.append({"index": index, "scoped_id": scoped_id, "errors": record_errors})
+                continue
+            try:
+                record = cast_record(schema, record)
+            except ValidationError as ve:
+                errors.append({"index": index, "scoped_id": scoped_id, "errors": ve.detail})
+                continue
+            values = {field.field_name: value for field, value in zip(schema.fields, record)}
+            if project.compact_storage:
+                values = compact_values(project.output_metadata, values)
+            outputs[scoped_id] = (index, values)
+
+        models = list(
+            GeneratedModel.objects.select_for_update().filter(project=project, scoped_id__in=outputs.keys()).only("id", "scoped_id")
+        )
+        for model in models:
+            model.output_parameters = outputs.pop(model.scoped_id)[1]
+            model.schema_version = project.schema_version
+        for scoped_id, (index, _) in outputs.items():
+            errors.append({"index": index, "scoped_id": scoped_id, "errors": ["Model does not exist."]})
+
+        GeneratedModel.objects.bulk_update(models, ["output_parameters", "schema_version"], batch_size=1000)
+        # bulk updates do not send post_save, so the project cache and change log are updated here
+        invalidate_project(project.project_name)
+        ProjectChange.record(project.project_name, [(ProjectChange.Kind.MODEL_UPDATED, model.scoped_id, None) for model in models])
+
+        return Response({"models_updated": len(models), "failures": sorted(errors, key=lambda error: error["index"])})
+
     def update(self, request, *args, **kwargs):
         generated_model = self.get_object()
         project = Project.objects.get(project_name=self.kwargs["project_pk"])
@@ -106,9 +445,8 @@ class GeneratedModelViewSet(viewsets.ModelViewSet):
             for filename, file in request.FILES.items():
                 if filename in fileset:
                     fileset[filename].delete()
-                file_object = AssetFile.objects.create(
+                AssetFile.objects.create(
                     file=file, tag=filename, generated_model=generated_model)
-                file_object.save()
 
             files_were_uploaded = True
 
@@ -139,6 +477,16 @@ class ProjectViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     authentication_classes = [SessionAuthentication, JWTAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    read_from_replica = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == "GET" and "fields" in self.request.query_params:
+            # only the selected columns are loaded; unknown names are reported by the serializer
+            columns = {field.name for field in Project._meta.concrete_fields}
+            selected = [name.strip() for name in self.request.query_params["fields"].split(",")]
+            queryset = queryset.only("project_name", *[name for name in selected if name in columns])
+        return queryset
 
     def update(self, request, *args, **kwargs):
         kwargs.update({"partial": True})
@@ -151,6 +499,111 @@ class ProjectViewSet(viewsets.ModelViewSet):
         instance.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=["get"])
+    def changes(self, request, *args, **kwargs):
+        """
+        Returns the project's changes after the sequence number given by `?since=` (0 by default), at most `?limit=`.
+
+        Models touched by the returned changes are included in their current state, keyed by scoped_id; deleted
+        models are absent. Clients keep `last_sequence` and pass it as `since` on their next sync.
+        """
+        project = self.get_object()
+        try:
+            since = int(request.query_params.get("since", 0))
+            limit = min(int(request.query_params.get("limit", 1000)), 10000)
+        except ValueError:
+            raise ValidationError("since and limit must be integers.")
+        return Response(project_changes(project, since, limit))
+
+    @action(detail=True, methods=["get"])
+    def bootstrap(self, request, *args, **kwargs):
+        """
+        Returns the project's schema, assets, metadata and a summary of its models in one response, so a client
+        can open a project with a single request. `?render=html` includes the rendered description.
+        """
+        project = self.get_object()
+        render_html = wants_html(request)
+        data = cached_for_project(
+            project.project_name, "bootstrap", {"render": render_html},
+            lambda: project_bootstrap(project, render_html)
+        )
+        return Response(data)
+
+    @action(detail=True, methods=["get"])
+    def manifest(self, request, *args, **kwargs):
+        """
+        Returns the URL of every asset file of the project as {scoped_id: {tag: url}}.
+        `?assets=` restricts the manifest to a comma-separated list of tags.
+        """
+        project = self.get_object()
+        tags = None
+        if "assets" in request.query_params:
+            tags = sorted({tag.strip() for tag in request.query_params["assets"].split(",") if tag.strip() != ""})
+            unknown = [tag for tag in tags if tag not in [asset["tag"] for asset in project.assets]]
+            if len(unknown) > 0:
+                raise ValidationError(f"Unknown asset tags: {unknown}")
+        data = cached_for_project(
+            project.project_name, "manifest", {"assets": tags},
+            lambda: asset_manifest(project, tags)
+        )
+        return Response(data)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, *args, **kwargs):
+        """
+        Streams a ZIP archive of the project's asset files, laid out as <scoped_id>/<tag>.<extension>.
+
+        `?assets=` restricts the archive to a comma-separated list of tags, `?models=` to scoped_ids and ranges of
+        scoped_ids (e.g. `0-99,250`).
+        """
+        project = self.get_object()
+        files = AssetFile.objects.filter(generated_model__project=project)
+        if "assets" in request.query_params:
+            tags = [tag.strip() for tag in request.query_params["assets"].split(",") if tag.strip() != ""]
+            unknown = [tag for tag in tags if tag not in [asset["tag"] for asset in project.assets]]
+            if len(unknown) > 0:
+                raise ValidationError(f"Unknown asset tags: {unknown}")
+            files = files.filter(tag__in=tags)
+        if "models" in request.query_params:
+            files = files.filter(generated_model__in=GeneratedModel.objects.filter(
+                scoped_id_filter(scoped_id_ranges(request.query_params["models"])), project=project
+            ))
+
+        entries = [
+            (archive_path(scoped_id, tag, name), name)
+            for scoped_id, tag, name in files.order_by("generated_model__scoped_id", "tag").values_list("generated_model__scoped_id", "tag", "file")
+        ]
+        storage = AssetFile._meta.get_field("file").storage
+        chunks = stream_zip(storage, entries) if "wsgi.version" in request.META else astream_zip(storage, entries)
+        response = StreamingHttpResponse(chunks, content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="{project.project_name}.zip"'
+        return response
+
+    @action(detail=True, methods=["post"])
+    def ingest(self, request, *args, **kwargs):
+        """
+        Stores the asset files of a tar or ZIP archive uploaded as the `archive` field, laid out like the archives of
+        `download`: <scoped_id>/<tag>.<extension>. Existing files of a model and tag are replaced.
+
+        The archive is rejected as a whole if any entry names an unknown model or tag. Returns a report per entry.
+        """
+        project = self.get_object()
+        if "archive" not in request.FILES:
+            raise ValidationError("Upload the archive as the 'archive' field of a multipart request.")
+        report = ingest_archive(project, request.FILES["archive"])
+        return Response({
+            "files_stored": len([entry for entry in report if entry["status"] != "failed"]),
+            "entries": report,
+        })
+
+    @action(detail=False, methods=["get"])
+    def cache_stats(self, request, *args, **kwargs):
+        """
+        Returns the hit rate of the project-scoped query cache for every project.
+        """
+        project_names = self.get_queryset().values_list("project_name", flat=True)
+        return Response(project_cache_stats(project_names))
+
 
 class MarkdownDocumentViewSet(viewsets.ModelViewSet):
     queryset = MarkdownDocument.objects.all()
@@ -159,6 +612,25 @@ class MarkdownDocumentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
 
+class SearchView(views.APIView):
+    """
+    Searches projects (by name, human name, captions and description) and markdown documents.
+    `?q=` is the search text, `?limit=` the maximum number of results (20 by default, at most 100).
+    """
+    permission_classes = [permissions.AllowAny]
+    read_from_replica = True
+
+    def get(self, request: Request, *args, **kwargs):
+        text = request.query_params.get("q", "").strip()
+        if text == "":
+            raise ValidationError("q must be a non-empty search text.")
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), 100)
+        except ValueError:
+            raise ValidationError("limit must be an integer.")
+        return Response(search(text, limit))
+
+
 class MetadataRequest(pydantic.BaseModel):
     field: Literal["captions", "human_name", "description"]
     new_content: str | List[Caption]
@@ -167,19 +639,26 @@ class MetadataRequest(pydantic.BaseModel):
 class ProjectMetadataView(views.APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    read_from_replica = True
 
     def get_instance(self) -> ProjectMetadata | None:
         try:
-            model = ProjectMetadata.objects.get(project__project_name=self.kwargs.get("pk"))
+            model = ProjectMetadata.objects.select_related("description").get(project_id=self.kwargs.get("pk"))
             return model
         except:
             return None
 
+    def dump(self, metadata: ProjectMetadata.Metadata) -> dict:
+        # the description's HTML is rendered on save; it is only sent when asked for with ?render=html
+        if wants_html(self.request):
+            return metadata.model_dump()
+        return metadata.model_dump(exclude={"description": {"html"}})
+
     def get(self, request: Request, *args, **kwargs):
         instance = self.get_instance()
         if instance is not None:
             metadata = ProjectMetadata.Metadata.model_validate(instance)
-            return Response(metadata.model_dump())
+            return Response(self.dump(metadata))
         else:
             raise APIException("Resource not found.")
 
@@ -187,7 +666,7 @@ class ProjectMetadataView(views.APIView):
         try:
             metadata = MetadataRequest.model_validate(request.data)
             instance = self.get_instance()
-            print(metadata)
+            logger.debug("Updating %s of the metadata of project '%s'.", metadata.field, self.kwargs.get("pk"))
             match metadata.field:
                 case "captions":
                     instance.captions = [caption.model_dump() for caption in metadata.new_content]
@@ -198,10 +677,69 @@ class ProjectMetadataView(views.APIView):
                 case "human_name":
                     instance.human_name = metadata.new_content
                     instance.save()
-            response = ProjectMetadata.Metadata.model_validate(self.get_instance())
+            response = ProjectMetadata.Metadata.model_validate(instance)
             return Response(
-                response.model_dump()
+                self.dump(response)
             )
         except pydantic.ValidationError as ve:
             return Response(ve.errors())
 
+
+
+STREAM_HEARTBEAT_SECONDS = 15
+
+
+async def project_stream(request, pk: str):
+    """
+    Server-sent event stream of a project's changes: newly created models, output updates and asset uploads,
+    each event carrying the changes and the current state of the models they touch.
+
+    Clients resume after a disconnect through the standard Last-Event-ID header (or `?since=`); the changes missed
+    in between are replayed from the change log before live events continue.
+    """
+    if "wsgi.version" in request.META:
+        return JsonResponse({"detail": "Event streams require the ASGI application (backend.asgi)."}, status=501)
+
+    try:
+        project = await Project.objects.aget(project_name=pk, deleted=False)
+    except Project.DoesNotExist:
+        raise Http404("Project not found.")
+    try:
+        cursor = int(request.headers.get("Last-Event-ID") or request.GET.get("since") or -1)
+    except ValueError:
+        cursor = -1
+
+    subscription = hub.subscribe(project.project_name)
+
+    def format_event(event: dict) -> str:
+        return f"id: {event['last_sequence']}\nevent: changes\ndata: {json.dumps(event)}\n\n"
+
+    async def stream():
+        nonlocal cursor
+        try:
+            while cursor >= 0:
+                missed = await sync_to_async(project_changes)(project, cursor, 1000)
+                if len(missed["changes"]) > 0:
+                    yield format_event(missed)
+                cursor = missed["last_sequence"]
+                if not missed["has_more"]:
+                    break
+
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                # skip changes already replayed from the change log
+                changes = [change for change in event["changes"] if change["sequence"] > cursor]
+                if len(changes) > 0:
+                    cursor = event["last_sequence"]
+                    yield format_event({**event, "changes": changes})
+        finally:
+            hub.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response